@@ -0,0 +1,172 @@
+'''
+Render listen-mode sessions to an audio file
+
+Runs the real Quiz.worksheet(speak=True, grade=False)
+loop, or one of the mental_math.py drills, with say()
+producing speech and sleep() producing silence on an
+audio timeline instead of in real time. Audio is
+written to the WAV file chunk by chunk as it is made.
+
+  render_quiz(DayOfTheWeek.generate_quiz(10), 'days.wav')
+  render_legacy(mental_math.addition, 'add.wav', num_problems=5)
+
+Speech comes from espeak-ng/espeak when installed and
+otherwise from ToneVoice, an offline stand-in with one
+tone per word so timings are realistic. Pass a .ogg
+path to encode with oggenc or ffmpeg afterwards.
+'''
+import contextlib
+import io
+import os
+import shutil
+import subprocess
+import wave
+import zlib
+
+import numpy as np
+
+# seconds of silence written per chunk
+SILENCE_CHUNK = 0.5
+
+
+class ToneVoice:
+  '''Stand-in text to speech, a short tone per word'''
+
+  def __init__(self, rate=16000, seconds_per_letter=0.05, gap=0.06):
+    self.rate = rate
+    self.seconds_per_letter = seconds_per_letter
+    self.gap = gap
+
+  def chunks(self, text):
+    '''int16 PCM bytes, one chunk per word'''
+    pause = np.zeros(int(self.gap * self.rate), dtype=np.int16)
+    for word in text.split():
+      seconds = max(0.12, self.seconds_per_letter * len(word))
+      t = np.arange(int(seconds * self.rate)) / self.rate
+      pitch = 220 + zlib.crc32(word.lower().encode()) % 440
+      envelope = np.minimum(1, np.minimum(t, seconds - t) * 40)
+      tone = 8000 * envelope * np.sin(2 * np.pi * pitch * t)
+      yield tone.astype(np.int16).tobytes()
+      yield pause.tobytes()
+
+
+class EspeakVoice:
+  '''Offline text to speech with espeak-ng or espeak'''
+
+  def __init__(self, executable=None, words_per_minute=150):
+    self.executable = executable or espeak_executable()
+    if self.executable is None:
+      raise RuntimeError('espeak-ng or espeak is not installed')
+    self.words_per_minute = words_per_minute
+    self.rate = 22050
+    # find out the rate espeak writes at
+    for _ in self.chunks('.'):
+      pass
+
+  def chunks(self, text, frames_per_chunk=8192):
+    wav = subprocess.run([self.executable, '--stdout',
+                          '-s', str(self.words_per_minute), text],
+                         check=True, capture_output=True).stdout
+    with wave.open(io.BytesIO(wav)) as w:
+      self.rate = w.getframerate()
+      while True:
+        frames = w.readframes(frames_per_chunk)
+        if not frames:
+          break
+        yield frames
+
+
+def espeak_executable():
+  return shutil.which('espeak-ng') or shutil.which('espeak')
+
+
+def default_voice():
+  if espeak_executable() is not None:
+    return EspeakVoice()
+  return ToneVoice()
+
+
+class Timeline:
+  '''
+  Streams speech and silence into a mono 16 bit WAV.
+  Has time() and sleep() so it can stand in for the
+  time module as the session clock.
+  '''
+
+  def __init__(self, path, voice=None):
+    self.voice = default_voice() if voice is None else voice
+    self.rate = self.voice.rate
+    self.frames = 0
+    self.wav = wave.open(path, 'wb')
+    self.wav.setnchannels(1)
+    self.wav.setsampwidth(2)
+    self.wav.setframerate(self.rate)
+    self.zeros = memoryview(bytes(2 * int(SILENCE_CHUNK * self.rate)))
+
+  def _write(self, data):
+    self.wav.writeframesraw(data)
+    self.frames += len(data) // 2
+
+  def say(self, text):
+    for chunk in self.voice.chunks(text):
+      self._write(chunk)
+
+  def sleep(self, seconds):
+    remaining = 2 * int(seconds * self.rate)
+    while remaining > 0:
+      n = min(remaining, len(self.zeros))
+      self._write(self.zeros[:n])
+      remaining -= n
+
+  def time(self):
+    return self.frames / self.rate
+
+  def close(self):
+    self.wav.close()
+
+
+def encode_ogg(wav_path, ogg_path):
+  '''Encode with oggenc or ffmpeg'''
+  if shutil.which('oggenc'):
+    command = ['oggenc', '-Q', '-o', ogg_path, wav_path]
+  elif shutil.which('ffmpeg'):
+    command = ['ffmpeg', '-loglevel', 'error', '-y', '-i', wav_path,
+               '-c:a', 'libvorbis', ogg_path]
+  else:
+    raise RuntimeError('Encoding OGG needs oggenc or ffmpeg')
+  subprocess.run(command, check=True)
+
+
+@contextlib.contextmanager
+def _timeline(path, voice):
+  ogg = path.lower().endswith('.ogg')
+  wav_path = path[:-4] + '.wav' if ogg else path
+  timeline = Timeline(wav_path, voice)
+  try:
+    yield timeline
+  finally:
+    timeline.close()
+  if ogg:
+    encode_ogg(wav_path, path)
+    os.remove(wav_path)
+
+
+def render_quiz(quiz, path, voice=None):
+  '''Render the listen mode worksheet of quiz, returns its length in s'''
+  import mental_math_exercises
+  from simulate import patched
+  with _timeline(path, voice) as timeline:
+    with patched(mental_math_exercises, say=timeline.say), \
+         contextlib.redirect_stdout(io.StringIO()):
+      quiz.worksheet(speak=True, grade=False, write=False, clock=timeline)
+    return timeline.time()
+
+
+def render_legacy(drill, path, voice=None, **kwargs):
+  '''Render a mental_math.py drill, returns its length in s'''
+  import mental_math
+  from simulate import patched
+  with _timeline(path, voice) as timeline:
+    with patched(mental_math, time=timeline, say=timeline.say):
+      drill(**kwargs)
+    return timeline.time()
@@ -0,0 +1,88 @@
+'''
+Rough timings for the batch code paths
+
+Run with: python benchmarks.py
+'''
+import time
+
+import numpy as np
+
+
+def bench_difficulty(num_problems=1000000):
+  '''Score a bank of 2 digit by 2 digit multiplications'''
+  import difficulty
+  x = np.random.randint(10, 100, num_problems)
+  y = np.random.randint(10, 100, num_problems)
+  t1 = time.perf_counter()
+  features = difficulty.operand_features('Multiplication', x, y)
+  difficulty.score(features)
+  t2 = time.perf_counter()
+  print(f'difficulty: scored {num_problems} problems in {t2 - t1:.3f}s')
+
+
+def bench_simulated_sessions(num_sessions=1000):
+  '''Simulated learners through the real worksheet grading code'''
+  import simulate
+  from mental_math_exercises import Multiplication
+  learner = simulate.SimulatedLearner(simulate.VirtualClock(), seed=0)
+  t1 = time.perf_counter()
+  simulate.run_sessions(lambda: Multiplication.generate_quiz(20, 2, 1),
+                        learner, num_sessions)
+  t2 = time.perf_counter()
+  print(f'simulate: {num_sessions} sessions of 20 problems '
+        f'in {t2 - t1:.3f}s')
+
+
+def bench_quizfile(num_problems=1000000, path='bench_quiz.mmq'):
+  '''Write and memory map a large quiz file'''
+  import os
+  import quizfile
+  from mental_math_exercises import Multiplication
+  quiz = Multiplication.generate_quiz(num_problems, 2, 2)
+  t1 = time.perf_counter()
+  quizfile.save(quiz, path)
+  t2 = time.perf_counter()
+  loaded = quizfile.load(path)
+  t3 = time.perf_counter()
+  columns = loaded.problems.columns_of('Multiplication')
+  products = columns['operand_1'] * columns['operand_2']
+  t4 = time.perf_counter()
+  problems = list(loaded.problems)
+  t5 = time.perf_counter()
+  del loaded, problems, columns, products
+  os.remove(path)
+  print(f'quizfile: {num_problems} problems written in {t2 - t1:.3f}s, '
+        f'mapped in {t3 - t2:.4f}s, read as columns in {t4 - t3:.4f}s, '
+        f'materialized in {t5 - t4:.3f}s')
+
+
+def bench_slots(num_problems=200000):
+  '''Memory of slotted problems against a __dict__ subclass, render time'''
+  import tracemalloc
+  from mental_math_exercises import DayOfTheWeek, Multiplication
+  quiz = Multiplication.generate_quiz(num_problems, 2, 2)
+  args = [(p.operand_1, p.operand_2) for p in quiz.problems]
+  # a subclass without __slots__ gets a __dict__ back
+  unslotted = type('Unslotted', (Multiplication,), {})
+  sizes = {}
+  for cls in (Multiplication, unslotted):
+    tracemalloc.start()
+    problems = [cls(x, y) for x, y in args]
+    sizes[cls] = tracemalloc.get_traced_memory()[0] / num_problems
+    tracemalloc.stop()
+    del problems
+  dates = DayOfTheWeek.generate_quiz(num_problems // 4).problems
+  t1 = time.perf_counter()
+  for p in dates:
+    p.human_readable()
+  t2 = time.perf_counter()
+  print(f'slots: {sizes[Multiplication]:.0f} bytes per problem, '
+        f'{sizes[unslotted]:.0f} with a __dict__, '
+        f'{len(dates)} dates rendered in {t2 - t1:.3f}s')
+
+
+if __name__ == '__main__':
+  bench_difficulty()
+  bench_simulated_sessions()
+  bench_quizfile()
+  bench_slots()
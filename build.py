@@ -0,0 +1,142 @@
+'''
+Incremental builds of a worksheet catalog
+
+The catalog is a JSON file listing worksheets:
+
+  {"worksheets": [
+    {"name": "mult_2x1",
+     "type": "Multiplication",
+     "params": {"num_problems": 60, "digits_1": 2, "digits_2": 1},
+     "seed": 3,
+     "layout": {"columns": 6, "horizontal": true}}
+  ]}
+
+Each worksheet is hashed together with the renderer
+version and only worksheets whose hash changed since
+the last build, or whose output is missing, are
+rebuilt, in parallel.
+
+  python build.py catalog.json worksheets/
+'''
+import argparse
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from mental_math_exercises import problem_types, seeded, HTML_RENDERER_VERSION
+
+MANIFEST = '.manifest.json'
+
+# generate_quiz draws from the global numpy and random generators, so
+# seeding and drawing must not interleave between threads
+_GENERATE_LOCK = threading.Lock()
+
+
+def spec_hash(spec) -> str:
+  '''Hash of everything a worksheet's output depends on'''
+  key = json.dumps({'spec': spec, 'renderer': HTML_RENDERER_VERSION},
+                   sort_keys=True)
+  return hashlib.sha256(key.encode()).hexdigest()
+
+
+def generate(spec):
+  '''The quiz for a worksheet spec, seeded when the spec has a seed'''
+  cls = problem_types()[spec['type']]
+  seed = spec.get('seed')
+  with _GENERATE_LOCK, seeded(seed):
+    return cls.generate_quiz(**spec.get('params', {}))
+
+
+def render(spec) -> (str, str):
+  '''(questions_html, answers_html) for a worksheet spec'''
+  return generate(spec).html_quiz(**spec.get('layout', {}))
+
+
+def output_paths(spec, out_dir) -> (str, str):
+  name = spec['name']
+  return (os.path.join(out_dir, f'{name}_questions.html'),
+          os.path.join(out_dir, f'{name}_answers.html'))
+
+
+def build_one(spec, out_dir):
+  qs, ans = render(spec)
+  q_path, a_path = output_paths(spec, out_dir)
+  with open(q_path, 'w') as f:
+    f.write(qs)
+  with open(a_path, 'w') as f:
+    f.write(ans)
+  return spec['name']
+
+
+def load_catalog(path):
+  with open(path) as f:
+    specs = json.load(f)['worksheets']
+  names = [spec['name'] for spec in specs]
+  if len(set(names)) != len(names):
+    raise ValueError('Worksheet names in the catalog must be unique')
+  return specs
+
+
+def load_manifest(out_dir):
+  try:
+    with open(os.path.join(out_dir, MANIFEST)) as f:
+      return json.load(f)
+  except FileNotFoundError:
+    return {}
+
+
+def save_manifest(out_dir, manifest):
+  path = os.path.join(out_dir, MANIFEST)
+  with open(path + '.tmp', 'w') as f:
+    json.dump(manifest, f, indent=1, sort_keys=True)
+  os.replace(path + '.tmp', path)
+
+
+def stale(specs, manifest, out_dir):
+  '''Specs whose inputs changed or whose outputs are missing'''
+  todo = []
+  for spec in specs:
+    if manifest.get(spec['name']) != spec_hash(spec):
+      todo.append(spec)
+    elif not all(os.path.exists(p) for p in output_paths(spec, out_dir)):
+      todo.append(spec)
+  return todo
+
+
+def build(catalog, out_dir, jobs=None, force=False):
+  '''Rebuild the stale worksheets of the catalog, returns their names'''
+  os.makedirs(out_dir, exist_ok=True)
+  specs = load_catalog(catalog)
+  manifest = load_manifest(out_dir)
+  todo = specs if force else stale(specs, manifest, out_dir)
+  built = []
+  if len(todo) == 1 or jobs == 1:
+    built = [build_one(spec, out_dir) for spec in todo]
+  elif todo:
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+      built = list(pool.map(build_one, todo, [out_dir] * len(todo)))
+  # only record worksheets that are still in the catalog
+  manifest = {spec['name']: spec_hash(spec) for spec in specs
+              if spec['name'] in manifest or spec['name'] in built}
+  save_manifest(out_dir, manifest)
+  return built
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+  parser.add_argument('catalog')
+  parser.add_argument('out_dir')
+  parser.add_argument('-j', '--jobs', type=int, default=None)
+  parser.add_argument('--force', action='store_true')
+  parser.add_argument('--profile', metavar='PREFIX',
+                      help='profile a serial build, see profiling.py')
+  args = parser.parse_args()
+  if args.profile:
+    from profiling import profiled
+    with profiled(args.profile):
+      built = build(args.catalog, args.out_dir, 1, args.force)
+  else:
+    built = build(args.catalog, args.out_dir, args.jobs, args.force)
+  print(f'Rebuilt {len(built)} worksheets: {", ".join(built)}')
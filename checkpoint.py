@@ -0,0 +1,215 @@
+'''
+Crash-safe worksheet sessions
+
+A Journal hook appends one JSON line per finished
+problem to a file, after a header line holding every
+problem of the quiz. Lines are flushed to the OS as
+they are written and fsync'd in batches, so a killed
+process loses nothing and a power cut at most the
+last batch.
+
+  quiz.add_hook(Journal('today.journal')).worksheet()
+
+After a crash or Ctrl-C carry on at the next
+unanswered problem with
+
+  resume_worksheet('today.journal')
+
+A new Journal replaces a finished journal at its path
+and refuses to overwrite an unfinished one.
+'''
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+
+from mental_math_exercises import Quiz, problem_types
+
+JOURNAL_VERSION = 1
+
+
+def _encode(value):
+  if isinstance(value, datetime):
+    return {'$datetime': value.isoformat()}
+  if isinstance(value, np.integer):
+    return int(value)
+  if isinstance(value, np.floating):
+    return float(value)
+  raise TypeError(f'Cannot journal {type(value).__name__}')
+
+
+def _decode(obj):
+  if '$datetime' in obj:
+    return datetime.fromisoformat(obj['$datetime'])
+  return obj
+
+
+class Journal:
+  '''Quiz hook appending each finished problem to path'''
+
+  def __init__(self, path, sync_every=8, sync_interval=2.0, resume=False):
+    '''
+    sync_every: fsync after this many problems
+    sync_interval: or after this many seconds
+    resume: append to the journal of this same quiz, see
+      resume_worksheet. Otherwise a finished journal at path
+      is replaced and an unfinished one raises FileExistsError.
+    '''
+    self.path = path
+    self.resume = resume
+    self.sync_every = sync_every
+    self.sync_interval = sync_interval
+    self.file = None
+    self.pending = 0
+    self.last_sync = time.monotonic()
+    self.answer = None
+
+  def _open(self, quiz):
+    problems = [[type(p).__name__, p.pause, p.args()] for p in quiz.problems]
+    exists = os.path.exists(self.path) and os.path.getsize(self.path) > 0
+    if self.resume:
+      if not exists:
+        raise FileNotFoundError(f'No journal to resume at {self.path}')
+      _check_header(self.path, problems)
+      self.file = open(self.path, 'a')
+      return
+    if exists and not _finished(self.path):
+      raise FileExistsError(f'{self.path} holds an unfinished worksheet, '
+                            'resume it or remove the file')
+    self.file = open(self.path, 'w')
+    header = {
+      'journal': JOURNAL_VERSION,
+      'log': quiz.log,
+      'learner': quiz.learner,
+      'grade': quiz.graded,
+      'problems': problems,
+      }
+    self._write(header)
+    self.sync()
+
+  def _write(self, record):
+    self.file.write(json.dumps(record, default=_encode) + '\n')
+    self.file.flush()
+
+  def sync(self):
+    os.fsync(self.file.fileno())
+    self.pending = 0
+    self.last_sync = time.monotonic()
+
+  def on_question(self, quiz, index, problem):
+    if self.file is None:
+      self._open(quiz)
+    self.answer = None
+
+  def on_answer(self, quiz, index, problem, answer, correct, elapsed):
+    self.answer = {'answer': answer, 'correct': bool(correct),
+                   'time': elapsed}
+
+  def on_reveal(self, quiz, index, problem):
+    record = {'i': index}
+    if self.answer is not None:
+      record.update(self.answer)
+    self._write(record)
+    self.pending += 1
+    if (self.pending >= self.sync_every or
+        time.monotonic() - self.last_sync >= self.sync_interval):
+      self.sync()
+
+  def on_finish(self, quiz):
+    if self.file is None:
+      return
+    self._write({'finished': True})
+    self.sync()
+    self.file.close()
+    self.file = None
+
+
+def load(path):
+  '''
+  Rebuild the quiz of a journal, returns (quiz, next
+  problem index, finished). quiz.graded is whether the
+  journaled worksheet asked for answers.
+  '''
+  with open(path) as f:
+    lines = f.read().split('\n')
+  header = json.loads(lines[0], object_hook=_decode)
+  if header.get('journal') != JOURNAL_VERSION:
+    raise ValueError(f'{path} is not a version {JOURNAL_VERSION} journal')
+  types = problem_types()
+  problems = [types[kind](pause=pause, **args)
+              for kind, pause, args in header['problems']]
+  quiz = Quiz(problems, log=header['log'], learner=header['learner'])
+  done = 0
+  finished = False
+  # the last line may be cut short by the crash
+  for line in lines[1:]:
+    try:
+      record = json.loads(line)
+    except ValueError:
+      break
+    if record.get('finished'):
+      finished = True
+      break
+    if record['i'] != done:
+      raise ValueError(f'{path} skips from problem {done} to {record["i"]}')
+    if 'correct' in record:
+      quiz.grades.append(record['correct'])
+      quiz.times.append(record['time'])
+    done += 1
+  quiz.graded = header.get('grade')
+  if quiz.graded is None and done:
+    # journals written before the header kept grade
+    quiz.graded = len(quiz.grades) > 0
+  return quiz, done, finished
+
+
+def resume_worksheet(path, hooks=(), **kwargs):
+  '''
+  Continue the journaled worksheet at its next
+  unanswered problem, kwargs go to Quiz.worksheet.
+  grade defaults to the journaled worksheet's.
+  '''
+  quiz, start, finished = load(path)
+  if finished:
+    raise RuntimeError(f'The worksheet in {path} is already finished')
+  if quiz.graded is not None:
+    grade = kwargs.setdefault('grade', quiz.graded)
+    if grade != quiz.graded:
+      raise ValueError(f'The worksheet in {path} was '
+                       f'{"" if quiz.graded else "not "}graded, '
+                       f'resume it with grade={quiz.graded}')
+  _truncate_partial_line(path)
+  for hook in hooks:
+    quiz.add_hook(hook)
+  quiz.add_hook(Journal(path, resume=True))
+  quiz.worksheet(start=start, **kwargs)
+  return quiz
+
+
+def _finished(path):
+  '''Whether the journal at path is finished, False if it is unreadable'''
+  try:
+    return load(path)[2]
+  except (ValueError, KeyError, TypeError):
+    return False
+
+
+def _check_header(path, problems):
+  '''Raise unless the journal at path was written for these problems'''
+  with open(path) as f:
+    header = json.loads(f.readline())
+  # compare as JSON so dates and numpy numbers match their encoding
+  expected = json.loads(json.dumps(problems, default=_encode))
+  if header.get('problems') != expected:
+    raise ValueError(f'{path} is the journal of a different quiz')
+
+
+def _truncate_partial_line(path):
+  '''Drop a last line without a newline left by a crash'''
+  with open(path, 'rb+') as f:
+    data = f.read()
+    end = data.rfind(b'\n') + 1
+    if end < len(data):
+      f.truncate(end)
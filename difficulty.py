@@ -0,0 +1,186 @@
+'''
+Difficulty features for mental math problems
+
+Every feature is computed with NumPy across whole
+operand arrays so a large bank of problems can be
+scored in one pass.
+'''
+import numpy as np
+
+FEATURES = ('digits', 'carries', 'borrows',
+            'partial_products', 'round_distance')
+
+FEATURE_DTYPE = np.dtype([(name, np.int64) for name in FEATURES])
+
+# relative weight of each feature in the combined score
+WEIGHTS = {
+  'digits': 1.0,
+  'carries': 1.0,
+  'borrows': 1.0,
+  'partial_products': 0.5,
+  'round_distance': 0.2,
+  }
+
+# attribute names holding the operands of each problem type
+OPERANDS = {
+  'Addition': ('operand_1', 'operand_2'),
+  'Subtraction': ('operand_1', 'operand_2'),
+  'Multiplication': ('operand_1', 'operand_2'),
+  'Division': ('dividend', 'divisor'),
+  'Powers': ('value', 'power'),
+  'WholeRoots': ('answer', 'power'),
+  'Roots': ('raised_value', 'power'),
+  'Modulo': ('value', 'modulo'),
+  }
+
+
+def _as_int(x):
+  return np.abs(np.asarray(x, dtype=np.int64))
+
+
+def digit_count(x):
+  '''Number of decimal digits of each value'''
+  x = _as_int(x)
+  count = np.ones(x.shape, dtype=np.int64)
+  rest = x // 10
+  while rest.any():
+    count += rest > 0
+    rest //= 10
+  return count
+
+
+def nonzero_digit_count(x):
+  '''Number of non-zero decimal digits of each value'''
+  x = _as_int(x).copy()
+  count = np.zeros(x.shape, dtype=np.int64)
+  while x.any():
+    count += (x % 10) > 0
+    x //= 10
+  return count
+
+
+def carry_count(x, y):
+  '''Number of carries when adding x and y column by column'''
+  x = _as_int(x).copy()
+  y = _as_int(y).copy()
+  carry = np.zeros(np.broadcast(x, y).shape, dtype=np.int64)
+  count = np.zeros_like(carry)
+  while x.any() or y.any() or carry.any():
+    carry = (x % 10 + y % 10 + carry) >= 10
+    count += carry
+    x //= 10
+    y //= 10
+  return count
+
+
+def borrow_count(x, y):
+  '''
+  Number of borrows when subtracting the smaller of
+  x and y from the larger column by column
+  '''
+  x = _as_int(x)
+  y = _as_int(y)
+  big = np.maximum(x, y)
+  small = np.minimum(x, y)
+  borrow = np.zeros(big.shape, dtype=np.int64)
+  count = np.zeros_like(borrow)
+  while small.any() or borrow.any():
+    borrow = (big % 10 - small % 10 - borrow) < 0
+    count += borrow
+    big //= 10
+    small //= 10
+  return count
+
+
+def partial_product_count(x, y):
+  '''
+  Number of single digit products needed to multiply
+  x and y the long way, zero digits are skipped
+  '''
+  return nonzero_digit_count(x) * nonzero_digit_count(y)
+
+
+def round_distance(x):
+  '''
+  Distance to the nearest round number, a multiple of
+  10 for 2 digit values, 100 for 3 digit values, etc.
+  '''
+  x = _as_int(x)
+  base = 10 ** np.maximum(digit_count(x) - 1, 1)
+  rest = x % base
+  return np.minimum(rest, base - rest)
+
+
+def perfect_power_distance(x, power):
+  '''Distance to the nearest perfect power'''
+  x = _as_int(x)
+  power = np.asarray(power, dtype=np.int64)
+  root = np.rint(x ** (1.0 / power)).astype(np.int64)
+  return np.abs(x - root ** power)
+
+
+def operand_features(kind, x, y):
+  '''
+  Compute the feature columns for operand arrays of
+  a single problem type, returns a structured array
+  '''
+  x = np.asarray(x)
+  y = np.asarray(y)
+  features = np.zeros(np.broadcast(x, y).shape, dtype=FEATURE_DTYPE)
+  if kind in ('Addition', 'Subtraction', 'Multiplication', 'Division',
+              'Modulo'):
+    features['digits'] = np.maximum(digit_count(x), digit_count(y))
+  else:
+    features['digits'] = digit_count(x)
+  if kind == 'Addition':
+    features['carries'] = carry_count(x, y)
+  elif kind == 'Subtraction':
+    features['borrows'] = borrow_count(x, y)
+  elif kind == 'Multiplication':
+    features['partial_products'] = partial_product_count(x, y)
+  elif kind in ('Powers', 'WholeRoots'):
+    features['round_distance'] = round_distance(x)
+  elif kind == 'Roots':
+    features['round_distance'] = perfect_power_distance(x, y)
+  return features
+
+
+def problem_features(problems):
+  '''Feature columns for a list of problems of any types'''
+  features = np.zeros(len(problems), dtype=FEATURE_DTYPE)
+  groups = {}
+  for k, problem in enumerate(problems):
+    groups.setdefault(type(problem).__name__, []).append(k)
+  for kind, index in groups.items():
+    if kind not in OPERANDS:
+      continue
+    a1, a2 = OPERANDS[kind]
+    x = [getattr(problems[k], a1) for k in index]
+    y = [getattr(problems[k], a2) for k in index]
+    features[index] = operand_features(kind, x, y)
+  return features
+
+
+def score(features, weights=None):
+  '''Weighted sum of the feature columns'''
+  weights = WEIGHTS if weights is None else weights
+  total = np.zeros(len(features))
+  for name, weight in weights.items():
+    total += weight * features[name]
+  return total
+
+
+def sort_quiz(quiz, reverse=False, weights=None):
+  '''Return a view of quiz with the problems ordered easiest first'''
+  order = np.argsort(score(problem_features(quiz.problems), weights),
+                     kind='stable')
+  if reverse:
+    order = order[::-1]
+  return quiz.view(order)
+
+
+def select_quiz(quiz, low=-np.inf, high=np.inf, weights=None):
+  '''Return a view of quiz keeping problems with low <= score <= high'''
+  s = score(problem_features(quiz.problems), weights)
+  keep = np.flatnonzero((s >= low) & (s <= high))
+  return quiz.view(keep)
@@ -0,0 +1,165 @@
+'''
+Keystroke level terminal drill
+
+Reads keys without waiting for Enter, shows a live
+countdown of each problem's pause and moves on as
+soon as a whole number answer has as many digits as
+the expected one. Every keystroke is timestamped.
+
+  quiz = Multiplication.generate_quiz(20, 2, 1, pause=10)
+  run(quiz)
+  quiz.keystrokes  # [[(seconds since shown, key), ...], ...]
+
+Only the answer and countdown lines are redrawn on
+each key or tick.
+'''
+import curses
+import time
+
+# how long the result of a problem stays on screen
+REVEAL_SECONDS = 0.8
+# how often the countdown is redrawn
+TICK_SECONDS = 0.05
+
+ENTER = (10, 13, curses.KEY_ENTER)
+BACKSPACE = (8, 127, curses.KEY_BACKSPACE)
+ESCAPE = 27
+
+
+def auto_length(problem):
+  '''Answer length that submits by itself, None if Enter is needed'''
+  expected = problem.expected_answer()
+  if isinstance(expected, float):
+    if not expected.is_integer() or hasattr(problem, 'abs_tol'):
+      return None
+    expected = int(expected)
+  return len(str(expected))
+
+
+class DrillState:
+  '''Typing state of the current problem, kept apart from curses'''
+
+  def __init__(self, problem, shown):
+    self.problem = problem
+    self.shown = shown
+    self.typed = ''
+    self.keystrokes = []
+    self.length = auto_length(problem)
+
+  def remaining(self, now):
+    return self.problem.pause - (now - self.shown)
+
+  def key(self, ch, now):
+    '''
+    Apply one key, returns True when the answer should
+    be submitted
+    '''
+    self.keystrokes.append((now - self.shown, ch))
+    if ch in ENTER:
+      return True
+    if ch in BACKSPACE:
+      self.typed = self.typed[:-1]
+      return False
+    if 0 <= ch < 256 and chr(ch).isprintable():
+      self.typed += chr(ch)
+    digits = self.typed.lstrip('-')
+    return (self.length is not None and digits.isdigit() and
+            len(self.typed) == self.length)
+
+
+class Screen:
+
+  def __init__(self, stdscr):
+    self.stdscr = stdscr
+    curses.curs_set(1)
+    stdscr.nodelay(True)
+    stdscr.keypad(True)
+
+  def _line(self, y, text):
+    width = self.stdscr.getmaxyx()[1]
+    self.stdscr.move(y, 0)
+    self.stdscr.clrtoeol()
+    self.stdscr.addnstr(y, 0, text, width - 1)
+
+  def question(self, k, count, text):
+    self.stdscr.erase()
+    self._line(0, f'Problem {k + 1} of {count}')
+    self._line(2, text)
+
+  def countdown(self, seconds):
+    self._line(4, f'{max(0.0, seconds):4.1f}s')
+
+  def answer(self, typed):
+    self._line(3, f'> {typed}')
+    self.stdscr.refresh()
+
+  def reveal(self, correct, text):
+    self._line(5, ('Right! ' if correct else 'Not quite. ') + text)
+    self.stdscr.refresh()
+
+
+def _session(stdscr, quiz, clock):
+  screen = Screen(stdscr)
+  grades, times, types, keystrokes = [], [], [], []
+  hooks = bool(quiz.hooks)
+  for k, problem in enumerate(quiz.problems):
+    q, a = problem.human_readable()
+    if hooks:
+      quiz._emit('on_question', k, problem)
+    state = DrillState(problem, clock.time())
+    screen.question(k, len(quiz.problems), q)
+    screen.countdown(problem.pause)
+    screen.answer('')
+    last_tick = state.shown
+    while True:
+      ch = stdscr.getch()
+      now = clock.time()
+      if ch == ESCAPE:
+        return grades, times, types, keystrokes, False
+      if ch != -1:
+        if state.key(ch, now):
+          break
+        screen.answer(state.typed)
+      elif state.remaining(now) <= 0:
+        break
+      elif now - last_tick >= TICK_SECONDS:
+        last_tick = now
+        screen.countdown(state.remaining(now))
+        screen.answer(state.typed)
+      else:
+        clock.sleep(0.005)
+    elapsed = clock.time() - state.shown
+    correct = problem.match_answer(state.typed)
+    grades.append(correct)
+    times.append(elapsed)
+    types.append(str(type(problem).__name__))
+    keystrokes.append(state.keystrokes)
+    if hooks:
+      quiz._emit('on_answer', k, problem, state.typed, correct, elapsed)
+      quiz._emit('on_reveal', k, problem)
+    screen.reveal(correct, a)
+    clock.sleep(REVEAL_SECONDS)
+    # ignore keys typed while the answer was shown
+    curses.flushinp()
+  return grades, times, types, keystrokes, True
+
+
+def run(quiz, clock=time):
+  '''
+  Drill quiz in the terminal. Escape stops early, the
+  answers so far are kept but the quiz is not finished.
+  '''
+  grades, times, types, keystrokes, done = curses.wrapper(
+    _session, quiz, clock)
+  quiz.keystrokes = keystrokes
+  if done:
+    quiz.finish(grades, times, types)
+  else:
+    quiz.grades, quiz.times, quiz.types = grades, times, types
+  return quiz
+
+
+if __name__ == '__main__':
+  from mental_math_exercises import Multiplication
+  run(Multiplication.generate_quiz(num_problems=10, digits_1=2,
+                                   digits_2=1, pause=15))
@@ -0,0 +1,268 @@
+'''
+One line drill definitions
+
+  TimesEleven = drill('a*11 where a in 2digit', 'TimesEleven')
+  TimesEleven.generate_quiz(20).worksheet()
+
+The expression may use +, -, *, //, % and ** on
+integer constants and the declared variables. Each
+variable is drawn from a domain, either Ndigit for
+every N digit number or lo..hi inclusive. A spec is
+compiled once: operands are drawn and answers are
+evaluated for the whole quiz with NumPy, and the
+spoken and LaTeX forms come from templates built from
+the expression.
+
+Compiling bounds every sub expression over the
+domains: divisors that can be zero and exponents that
+can be negative are rejected, and drills whose answers
+can pass int64 are evaluated on Python ints instead.
+'''
+import ast
+import math
+import re
+
+import numpy as np
+
+from mental_math_exercises import ProblemInterface, Quiz
+
+_DOMAIN = re.compile(r'^\s*([A-Za-z_]\w*)\s+in\s+'
+                     r'(?:(\d+)\s*digits?|(-?\d+)\s*\.\.\s*(-?\d+))\s*$')
+
+INT64 = np.iinfo(np.int64)
+# powers with more bits than this are treated as unbounded
+_HUGE_BITS = 4096
+
+# ast operator -> (spoken, latex, precedence)
+_OPERATORS = {
+  ast.Add: ('plus', '+', 1),
+  ast.Sub: ('minus', '-', 1),
+  ast.Mult: ('times', '\\times', 2),
+  ast.FloorDiv: ('divided by', '\\div', 2),
+  ast.Mod: ('mod', '\\bmod', 2),
+  ast.Pow: ('to the power of', '^', 3),
+  }
+
+
+def parse_domain(text):
+  '''"a in 2digit" -> ('a', low, high) with high inclusive'''
+  match = _DOMAIN.match(text)
+  if match is None:
+    raise ValueError(f'Cannot parse domain "{text.strip()}", '
+                     'expected "x in 2digit" or "x in 10..99"')
+  name, digits, low, high = match.groups()
+  if digits is not None:
+    digits = int(digits)
+    if not 1 <= digits <= 18:
+      raise ValueError('Digit domains take 1 to 18 digits')
+    return name, 10**(digits-1), 10**digits - 1
+  low, high = int(low), int(high)
+  if low > high:
+    raise ValueError(f'Empty domain {low}..{high}')
+  if low < INT64.min or high > INT64.max:
+    raise ValueError(f'Domain {low}..{high} does not fit in 64 bits')
+  return name, low, high
+
+
+def _pow_bounds(base, exponent):
+  (blo, bhi), (elo, ehi) = base, exponent
+  size = max(abs(blo), abs(bhi))
+  if size > 1 and ehi * math.log2(size) > _HUGE_BITS:
+    # far past int64, exact bounds are not worth computing
+    return -math.inf if blo < 0 else 0, math.inf
+  if blo >= 0:
+    # monotonic in each argument, so the corners are the extremes
+    corners = [b**e for b in (blo, bhi) for e in (elo, ehi)]
+    return min(corners), max(corners)
+  largest = max(size**ehi, size**elo)
+  return -largest, largest
+
+
+def _check(node, domains, ranges):
+  '''
+  Reject anything but arithmetic on the declared names,
+  zero divisors and negative exponents. Returns the
+  (low, high) the node can take and appends the range
+  of every sub expression to ranges.
+  '''
+  if isinstance(node, ast.BinOp):
+    if type(node.op) not in _OPERATORS:
+      raise ValueError(f'Unsupported operator {type(node.op).__name__}')
+    lo1, hi1 = _check(node.left, domains, ranges)
+    lo2, hi2 = _check(node.right, domains, ranges)
+    divides = isinstance(node.op, (ast.FloorDiv, ast.Mod))
+    if divides and lo2 <= 0 <= hi2:
+      raise ValueError(f'The divisor {ast.unparse(node.right)} can be zero')
+    if isinstance(node.op, ast.Pow) and lo2 < 0:
+      raise ValueError(f'The exponent {ast.unparse(node.right)} '
+                       'can be negative')
+    if not all(map(math.isfinite, (lo1, hi1, lo2, hi2))):
+      bounds = -math.inf, math.inf
+    elif isinstance(node.op, ast.Add):
+      bounds = lo1 + lo2, hi1 + hi2
+    elif isinstance(node.op, ast.Sub):
+      bounds = lo1 - hi2, hi1 - lo2
+    elif isinstance(node.op, ast.Mult):
+      corners = [a * b for a in (lo1, hi1) for b in (lo2, hi2)]
+      bounds = min(corners), max(corners)
+    elif divides:
+      if isinstance(node.op, ast.Mod):
+        bounds = (0, hi2 - 1) if lo2 > 0 else (lo2 + 1, 0)
+      else:
+        corners = [a // b for a in (lo1, hi1) for b in (lo2, hi2)]
+        bounds = min(corners), max(corners)
+    else:
+      bounds = _pow_bounds((lo1, hi1), (lo2, hi2))
+  elif isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+    lo, hi = _check(node.operand, domains, ranges)
+    bounds = -hi, -lo
+  elif isinstance(node, ast.Name):
+    if node.id not in domains:
+      raise ValueError(f'{node.id} is not declared in the where clause')
+    bounds = domains[node.id]
+  elif isinstance(node, ast.Constant) and type(node.value) is int:
+    bounds = node.value, node.value
+  else:
+    raise ValueError(f'Unsupported expression {ast.dump(node)}')
+  ranges.append(bounds)
+  return bounds
+
+
+def _template(node, latex):
+  '''
+  Format string for the expression with {name}
+  placeholders, returns (template, precedence)
+  '''
+  if isinstance(node, ast.Name):
+    return '{' + node.id + '}', 4
+  if isinstance(node, ast.Constant):
+    return str(node.value), 4
+  if isinstance(node, ast.UnaryOp):
+    inner, p = _template(node.operand, latex)
+    if p < 4:
+      inner = f'({inner})'
+    return f'-{inner}' if latex else f'minus {inner}', 3
+  spoken, symbol, p = _OPERATORS[type(node.op)]
+  left, lp = _template(node.left, latex)
+  right, rp = _template(node.right, latex)
+  # ** is right associative, the rest are left associative
+  if lp < p or (lp == p and isinstance(node.op, ast.Pow)):
+    left = f'({left})'
+  if rp < p or (rp == p and not isinstance(node.op, ast.Pow)):
+    right = f'({right})'
+  if not latex:
+    return f'{left} {spoken} {right}', p
+  if isinstance(node.op, ast.Pow):
+    # doubled braces are literal braces once formatted
+    return '{{' + left + '}}^{{' + right + '}}', p
+  return f'{left} {symbol} {right}', p
+
+
+class Drill(ProblemInterface):
+  '''Base class of the drills made by drill()'''
+  __slots__ = ('operands', 'answer')
+
+  spec = None
+  variables = ()
+  lows = ()
+  highs = ()
+  code = None
+  # object when answers can overflow int64, they are then Python ints
+  dtype = np.int64
+  text_template = ''
+  latex_template = ''
+
+  @classmethod
+  def evaluate(cls, **operands):
+    '''Answers for operand arrays, or single values'''
+    return eval(cls.code, {'__builtins__': {}}, operands)
+
+  @classmethod
+  def generate_arrays(cls, num_problems):
+    '''Operand arrays by name and the answer array'''
+    operands = {}
+    for name, low, high in zip(cls.variables, cls.lows, cls.highs):
+      operands[name] = np.random.randint(low, high + 1, num_problems,
+                                         dtype=np.int64).astype(cls.dtype)
+    return operands, cls.evaluate(**operands)
+
+  @classmethod
+  def generate_quiz(cls, num_problems, pause=30):# -> Quiz:
+    operands, answers = cls.generate_arrays(num_problems)
+    columns = [operands[name].tolist() for name in cls.variables]
+    answers = answers.tolist()
+    problems = []
+    for k, values in enumerate(zip(*columns)):
+      problems.append(cls(*values, pause=pause, answer=answers[k]))
+    return Quiz(problems)
+
+  def __init__(self, *operands, pause=30, answer=None, **named):
+    super(Drill, self).__init__(pause)
+    if named:
+      operands = tuple(named[name] for name in self.variables)
+    if len(operands) != len(self.variables):
+      raise TypeError(f'{type(self).__name__} takes operands '
+                      f'{", ".join(self.variables)}')
+    self.operands = operands
+    if answer is None:
+      answer = self.evaluate(**dict(zip(self.variables, operands)))
+    self.answer = answer
+
+  def _values(self):
+    return dict(zip(self.variables, self.operands))
+
+  def args(self) -> dict:
+    return self._values()
+
+  def human_readable(self) -> (str, str):
+    problem = self.text_template.format(**self._values())
+    q = f'What is {problem}'
+    a = f'{problem} equals {self.answer}'
+    return q, a
+
+  def match_answer(self, answer) -> bool:
+    try:
+      answer = int(answer)
+    except:
+      pass
+    return answer == self.answer
+
+  def to_latex(self, horizontal=True) -> (str, str):
+    problem = self.latex_template.format(**self._values())
+    return problem, f'{problem} = {self.answer}'
+
+
+def drill(spec, name):
+  '''
+  Compile "expression where a in 2digit, b in 10..20"
+  into a new Drill subclass called name
+  '''
+  if ' where ' not in spec:
+    raise ValueError('A drill needs "where" to declare its variables')
+  expression, domains = spec.split(' where ', 1)
+  parsed = [parse_domain(d) for d in domains.split(',')]
+  names = [p[0] for p in parsed]
+  if len(set(names)) != len(names):
+    raise ValueError('Each variable can only be declared once')
+  tree = ast.parse(expression.strip(), mode='eval')
+  ranges = []
+  _check(tree.body, {p[0]: (p[1], p[2]) for p in parsed}, ranges)
+  fits = all(INT64.min <= lo and hi <= INT64.max for lo, hi in ranges)
+  attrs = {
+    'spec': spec,
+    'variables': tuple(names),
+    'lows': tuple(p[1] for p in parsed),
+    'highs': tuple(p[2] for p in parsed),
+    'code': compile(tree, f'<drill {name}>', 'eval'),
+    'dtype': np.int64 if fits else object,
+    'text_template': _template(tree.body, latex=False)[0],
+    'latex_template': _template(tree.body, latex=True)[0],
+    '__doc__': f'Practice {spec}',
+    '__slots__': (),
+    }
+  return type(name, (Drill,), attrs)
+
+
+TimesEleven = drill('a*11 where a in 2digit', 'TimesEleven')
+SquareNearFifty = drill('a**2 where a in 40..60', 'SquareNearFifty')
+NearHundred = drill('a*b where a in 90..110, b in 90..110', 'NearHundred')
@@ -0,0 +1,227 @@
+'''
+Classroom leaderboards by problem type
+
+Each board ranks every learner's personal best for one
+problem type by accuracy or by speed. Boards are
+updated one finished quiz at a time, and top-k and
+rank queries walk an order statistics tree so they
+cost O(log n) instead of a rescan of every log.
+
+  board = Leaderboard()
+  quiz.set_learner('ada').add_hook(board).worksheet()
+  board.top('Multiplication', 'speed', 10)
+  board.rank('ada', 'Multiplication', 'accuracy')
+
+Summaries without a learner are ignored. A quiz only
+counts for the speed board when at least
+SPEED_MIN_ACCURACY of its problems of that type were
+right, so fast wrong answers do not win it; speed ties
+go to the more accurate learner.
+'''
+import json
+import random
+
+METRICS = ('accuracy', 'speed')
+# share of right answers a quiz needs to enter the speed board
+SPEED_MIN_ACCURACY = 0.8
+
+
+class _Node:
+  __slots__ = ('key', 'priority', 'left', 'right', 'size')
+
+  def __init__(self, key, priority):
+    self.key = key
+    self.priority = priority
+    self.left = None
+    self.right = None
+    self.size = 1
+
+
+def _size(node):
+  return 0 if node is None else node.size
+
+
+def _update(node):
+  node.size = 1 + _size(node.left) + _size(node.right)
+  return node
+
+
+def _split(node, key):
+  '''(keys < key, keys >= key)'''
+  if node is None:
+    return None, None
+  if node.key < key:
+    left, right = _split(node.right, key)
+    node.right = left
+    return _update(node), right
+  left, right = _split(node.left, key)
+  node.left = right
+  return left, _update(node)
+
+
+def _merge(left, right):
+  if left is None:
+    return right
+  if right is None:
+    return left
+  if left.priority > right.priority:
+    left.right = _merge(left.right, right)
+    return _update(left)
+  right.left = _merge(left, right.left)
+  return _update(right)
+
+
+class OrderStatisticTree:
+  '''Treap of unique comparable keys with subtree sizes'''
+
+  def __init__(self, seed=None):
+    self.root = None
+    self.random = random.Random(seed)
+
+  def __len__(self):
+    return _size(self.root)
+
+  def insert(self, key):
+    left, right = _split(self.root, key)
+    node = _Node(key, self.random.random())
+    self.root = _merge(_merge(left, node), right)
+
+  def remove(self, key):
+    left, right = _split(self.root, key)
+    # the smallest key of right is key when it is present
+    if right is not None:
+      _, right = self._pop_first(right, key)
+    self.root = _merge(left, right)
+
+  def _pop_first(self, node, key):
+    if node.left is None:
+      if node.key == key:
+        return node, node.right
+      return None, node
+    popped, node.left = self._pop_first(node.left, key)
+    return popped, _update(node)
+
+  def rank(self, key) -> int:
+    '''Number of keys smaller than key'''
+    node, rank = self.root, 0
+    while node is not None:
+      if node.key < key:
+        rank += _size(node.left) + 1
+        node = node.right
+      else:
+        node = node.left
+    return rank
+
+  def select(self, k):
+    '''The key with k smaller keys'''
+    node = self.root
+    while node is not None:
+      left = _size(node.left)
+      if k < left:
+        node = node.left
+      elif k == left:
+        return node.key
+      else:
+        k -= left + 1
+        node = node.right
+    raise IndexError('rank out of range')
+
+  def first(self, k):
+    '''The k smallest keys in order'''
+    keys, stack, node = [], [], self.root
+    while (stack or node is not None) and len(keys) < k:
+      if node is not None:
+        stack.append(node)
+        node = node.left
+      else:
+        node = stack.pop()
+        keys.append(node.key)
+        node = node.right
+    return keys
+
+
+def _sort_key(metric, correct, mean_time, learner):
+  '''Smaller sorts first'''
+  if metric == 'accuracy':
+    return (-correct, mean_time, learner)
+  return (mean_time, -correct, learner)
+
+
+class Leaderboard:
+
+  def __init__(self, speed_min_accuracy=SPEED_MIN_ACCURACY):
+    self.speed_min_accuracy = speed_min_accuracy
+    # (problem type, metric) -> tree
+    self.boards = {}
+    # (problem type, metric, learner) -> key in the tree
+    self.best = {}
+    # log path -> bytes already read
+    self.offsets = {}
+
+  def _submit(self, learner, problem_type, correct, mean_time):
+    for metric in METRICS:
+      if metric == 'speed' and correct < self.speed_min_accuracy:
+        continue
+      key = _sort_key(metric, correct, mean_time, learner)
+      who = (problem_type, metric, learner)
+      old = self.best.get(who)
+      if old is not None and old <= key:
+        continue
+      board = self.boards.get((problem_type, metric))
+      if board is None:
+        board = self.boards[(problem_type, metric)] = OrderStatisticTree()
+      if old is not None:
+        board.remove(old)
+      board.insert(key)
+      self.best[who] = key
+
+  def update(self, summary):
+    '''Add one Quiz.get_summary() result, a dict or JSON'''
+    if isinstance(summary, str):
+      summary = json.loads(summary)
+    learner = summary.get('learner')
+    if learner is None or not summary.get('graded'):
+      return
+    by_type = summary.get('by_type')
+    if by_type is None:
+      by_type = {t: summary for t in summary['problem_types']}
+    for problem_type, stats in by_type.items():
+      correct = stats['correct_count'] / stats['problem_count']
+      self._submit(learner, problem_type, correct, stats['mean_time'])
+
+  def on_finish(self, quiz):
+    self.update(quiz.get_summary())
+
+  def follow(self, log):
+    '''Read the summaries appended to log since the last call'''
+    with open(log) as f:
+      f.seek(self.offsets.get(log, 0))
+      while True:
+        line = f.readline()
+        if not line.endswith('\n'):
+          # leave a partly written line for next time
+          break
+        if line.strip():
+          self.update(line)
+        self.offsets[log] = f.tell()
+
+  def _entry(self, key, metric):
+    if metric == 'accuracy':
+      correct, mean_time, learner = -key[0], key[1], key[2]
+    else:
+      mean_time, correct, learner = key[0], -key[1], key[2]
+    return {'learner': learner, 'correct': correct, 'mean_time': mean_time}
+
+  def top(self, problem_type, metric='accuracy', k=10):
+    '''The k best learners for a problem type'''
+    board = self.boards.get((problem_type, metric))
+    if board is None:
+      return []
+    return [self._entry(key, metric) for key in board.first(k)]
+
+  def rank(self, learner, problem_type, metric='accuracy'):
+    '''1 based place of learner, None when they have no score'''
+    key = self.best.get((problem_type, metric, learner))
+    if key is None:
+      return None
+    return self.boards[(problem_type, metric)].rank(key) + 1
@@ -0,0 +1,136 @@
+'''
+Merge practice logs from several devices
+
+Every device appends one JSON summary per line to its
+own log, oldest first. merge() streams any number of
+them into one log sorted by quiz_date with a heap, so
+memory grows with the number of logs and not with
+their length. A summary seen twice, for example in a
+log copied from another phone, is written once.
+
+quiz_date is local time, so a clock change can leave
+a few lines older than the ones before them. They are
+reported, kept aside in memory and merged into place.
+
+  python logmerge.py all.log phone.log tablet.log [--learner ada]
+
+The output may also be one of the inputs, merging new
+device logs into an existing store is safe to repeat.
+'''
+import argparse
+import heapq
+import json
+import os
+import sys
+
+
+def _summaries(path, limit=None):
+  '''
+  (line number, quiz_date, line) for each summary in a
+  log, up to line number limit. Blank lines and a last
+  line cut short mid write are skipped.
+  '''
+  with open(path) as f:
+    for number, line in enumerate(f, 1):
+      if limit is not None and number > limit:
+        break
+      if not line.endswith('\n'):
+        # a device may still be writing it
+        break
+      line = line.strip()
+      if not line:
+        continue
+      try:
+        date = json.loads(line)['quiz_date']
+      except (ValueError, KeyError, TypeError):
+        raise ValueError(f'{path}:{number} is not a quiz summary') from None
+      yield number, date, line
+
+
+def _report(message):
+  print(message, file=sys.stderr)
+
+
+def read_log(path, report=_report):
+  '''
+  Two sorted streams of (quiz_date, line): the lines
+  not older than any line before them, read lazily, and
+  the few that are, which a clock change or the end of
+  daylight saving time leaves behind, as a list.
+  '''
+  late = []
+  last = ''
+  count = 0
+  for number, date, line in _summaries(path):
+    count = number
+    if date < last:
+      report(f'{path}:{number} is older than the line before it, '
+             'merged out of order')
+      late.append((date, line))
+    else:
+      last = date
+  late.sort()
+
+  def in_order():
+    # stop where the first pass did, the device may have appended since
+    last = ''
+    for _, date, line in _summaries(path, count):
+      if date >= last:
+        last = date
+        yield date, line
+  return in_order(), late
+
+
+def _canonical(line):
+  return json.dumps(json.loads(line), sort_keys=True, separators=(',', ':'))
+
+
+def merge(paths, learner=None, report=_report):
+  '''
+  Summary lines of all paths in quiz_date order, without
+  repeats. report is called with a message for each line
+  found out of order.
+  '''
+  streams = []
+  for path in paths:
+    in_order, late = read_log(path, report)
+    streams.append(in_order)
+    if late:
+      streams.append(late)
+  merged = heapq.merge(*streams)
+  date, seen = None, set()
+  for line_date, line in merged:
+    # repeats share a quiz_date, so only lines of the current one are kept
+    if line_date != date:
+      date, seen = line_date, set()
+    key = _canonical(line)
+    if key in seen:
+      continue
+    seen.add(key)
+    if learner is not None and json.loads(line).get('learner') != learner:
+      continue
+    yield line
+
+
+def merge_logs(out, paths, learner=None):
+  '''Write the merged logs to out, returns the number of summaries'''
+  count = 0
+  tmp = out + '.tmp'
+  with open(tmp, 'w') as f:
+    for line in merge(paths, learner):
+      f.write(line)
+      f.write('\n')
+      count += 1
+  os.replace(tmp, out)
+  return count
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+  parser.add_argument('out')
+  parser.add_argument('logs', nargs='+')
+  parser.add_argument('--learner', default=None,
+                      help='keep only the summaries of this learner')
+  args = parser.parse_args()
+  count = merge_logs(args.out, args.logs, args.learner)
+  print(f'Wrote {count} summaries to {args.out}')
@@ -0,0 +1,253 @@
+'''
+Major system pegs for long numbers
+
+Each digit is a consonant sound and a number is
+remembered as words spelling those sounds in order,
+vowels and w, h, y being free:
+
+  0 s z    1 t d th   2 n    3 m    4 r
+  5 l      6 j sh ch  7 k g  8 f v  9 p b
+
+Words are kept in a trie keyed on their digit strings
+and encode() splits a number into as few words as
+possible with dynamic programming over the trie, fast
+enough for thousands of digits of pi:
+
+  encode('31415926')  # [('314', 'meteor'), ...]
+
+  python major_system.py 31415926535 [--words words.txt]
+'''
+import argparse
+import sys
+
+# pegs for 0 to 9 and 00 to 99, every number can be encoded with these
+PEGS = {
+  '0': 'zoo', '1': 'tie', '2': 'noah', '3': 'ma', '4': 'rye',
+  '5': 'law', '6': 'shoe', '7': 'cow', '8': 'ivy', '9': 'bee',
+  '00': 'sauce', '01': 'seat', '02': 'sun', '03': 'sumo', '04': 'sour',
+  '05': 'sail', '06': 'sash', '07': 'sack', '08': 'safe', '09': 'soap',
+  '10': 'toes', '11': 'tot', '12': 'tuna', '13': 'tomb', '14': 'tire',
+  '15': 'tail', '16': 'dish', '17': 'tack', '18': 'dove', '19': 'tub',
+  '20': 'nose', '21': 'net', '22': 'nun', '23': 'name', '24': 'nero',
+  '25': 'nail', '26': 'notch', '27': 'neck', '28': 'knife', '29': 'knob',
+  '30': 'mouse', '31': 'mat', '32': 'moon', '33': 'mummy', '34': 'mower',
+  '35': 'mule', '36': 'match', '37': 'mug', '38': 'movie', '39': 'map',
+  '40': 'rose', '41': 'rat', '42': 'rain', '43': 'ram', '44': 'rower',
+  '45': 'roll', '46': 'roach', '47': 'rock', '48': 'roof', '49': 'rope',
+  '50': 'lace', '51': 'light', '52': 'lion', '53': 'lime', '54': 'lure',
+  '55': 'lily', '56': 'leech', '57': 'log', '58': 'lava', '59': 'lip',
+  '60': 'cheese', '61': 'sheet', '62': 'chain', '63': 'chime', '64': 'chair',
+  '65': 'jail', '66': 'judge', '67': 'chalk', '68': 'chef', '69': 'ship',
+  '70': 'case', '71': 'cat', '72': 'coin', '73': 'comb', '74': 'car',
+  '75': 'coal', '76': 'cage', '77': 'cake', '78': 'cave', '79': 'cub',
+  '80': 'fez', '81': 'feet', '82': 'fan', '83': 'foam', '84': 'fire',
+  '85': 'file', '86': 'fish', '87': 'fig', '88': 'fife', '89': 'fob',
+  '90': 'bus', '91': 'bat', '92': 'bone', '93': 'bomb', '94': 'bear',
+  '95': 'bell', '96': 'beach', '97': 'book', '98': 'beef', '99': 'baby',
+  }
+
+# longer words so common runs need fewer pegs
+WORDS = {
+  '004': 'saucer', '014': 'oyster', '015': 'saddle', '041': 'wizard',
+  '054': 'sailor', '094': 'supper', '124': 'dinner', '125': 'tunnel',
+  '127': 'donkey', '131': 'tomato', '143': 'drum', '147': 'turkey',
+  '159': 'tulip', '174': 'dagger', '191': 'teapot', '215': 'needle',
+  '303': 'museum', '314': 'meteor', '344': 'mirror', '352': 'melon',
+  '382': 'muffin', '429': 'rainbow', '471': 'rocket', '484': 'river',
+  '491': 'rabbit', '494': 'harbor', '514': 'ladder', '515': 'ladle',
+  '531': 'helmet', '532': 'lemon', '540': 'walrus', '651': 'shield',
+  '714': 'guitar', '715': 'kettle', '722': 'cannon', '731': 'comet',
+  '735': 'camel', '741': 'carrot', '852': 'violin', '911': 'potato',
+  '912': 'python', '914': 'butter', '915': 'bottle', '922': 'banana',
+  '941': 'pirate', '945': 'barrel', '946': 'bridge', '975': 'pickle',
+  '991': 'puppet', '994': 'pepper', '995': 'bubble', '0914': 'spider',
+  '1041': 'desert', '1204': 'dinosaur', '1415': 'turtle', '1472': 'dragon',
+  '1582': 'telephone', '3212': 'mountain', '3495': 'marble',
+  '4014': 'rooster', '5041': 'lizard', '7215': 'candle', '7390': 'compass',
+  '7412': 'garden', '8401': 'forest', '8572': 'volcano', '9071': 'biscuit',
+  '9205': 'pencil', '9521': 'planet', '14391': 'trumpet', '32014': 'monster',
+  '52142': 'lantern', '59014': 'lobster', '94105': 'pretzel',
+  '99742': 'popcorn',
+  }
+
+# spelling rules for word lists without digits, longest pattern first
+_SOUNDS = (
+  ('tch', '6'), ('sch', '6'), ('dg', '6'), ('ck', '7'), ('ch', '6'),
+  ('sh', '6'), ('th', '1'), ('ph', '8'), ('gh', ''), ('ng', '27'),
+  ('qu', '7'), ('x', '70'),
+  )
+_LETTERS = {
+  's': '0', 'z': '0', 't': '1', 'd': '1', 'n': '2', 'm': '3', 'r': '4',
+  'l': '5', 'j': '6', 'k': '7', 'q': '7', 'f': '8', 'v': '8', 'p': '9',
+  'b': '9',
+  }
+
+
+def word_digits(word) -> str:
+  '''
+  Digits of a word from its spelling. English spelling
+  is not phonetic, give word lists explicit digits where
+  this guess is wrong.
+  '''
+  word = ''.join(c for c in word.lower() if c.isalpha())
+  digits = []
+  previous = ''
+  k = 0
+  while k < len(word):
+    for pattern, sound in _SOUNDS:
+      if word.startswith(pattern, k):
+        k += len(pattern)
+        break
+    else:
+      c = word[k]
+      k += 1
+      if c == previous:
+        # double letters are one sound
+        continue
+      previous = c
+      soft = word[k:k+1] in ('e', 'i', 'y')
+      if c == 'c':
+        sound = '0' if soft else '7'
+      elif c == 'g':
+        sound = '6' if soft else '7'
+      else:
+        sound = _LETTERS.get(c, '')
+      digits.append(sound)
+      continue
+    previous = ''
+    digits.append(sound)
+  return ''.join(digits)
+
+
+class PegTrie:
+  '''Words by digit string, walked a digit at a time'''
+
+  def __init__(self, words=None):
+    '''words: digits -> word, the built in pegs by default'''
+    self.root = {}
+    self.depth = 0
+    if words is None:
+      words = {**PEGS, **WORDS}
+    for digits, word in words.items():
+      self.insert(digits, word)
+
+  def insert(self, digits, word, first=False):
+    '''first: put word ahead of the words already there'''
+    node = self.root
+    for d in digits:
+      node = node.setdefault(d, {})
+    # the first word for a digit string is the one encode() uses
+    words = node.setdefault(None, [])
+    if first:
+      words.insert(0, word)
+    else:
+      words.append(word)
+    self.depth = max(self.depth, len(digits))
+
+  def words(self, digits):
+    node = self.root
+    for d in digits:
+      node = node.get(d)
+      if node is None:
+        return []
+    return node.get(None, [])
+
+  def matches(self, digits, start):
+    '''(end, words) for every word spelling a prefix of digits[start:]'''
+    node = self.root
+    for end in range(start, min(len(digits), start + self.depth)):
+      node = node.get(digits[end])
+      if node is None:
+        return
+      words = node.get(None)
+      if words:
+        yield end + 1, words
+
+
+def load_words(path, trie=None):
+  '''
+  Add a word list to trie, one word per line optionally
+  followed by its digits, # starts a comment. The list's
+  words go ahead of those already in trie, the built in
+  pegs by default, so they are the pegs encode() uses.
+  '''
+  loaded = {}
+  with open(path) as f:
+    for line in f:
+      parts = line.split('#', 1)[0].split()
+      if not parts:
+        continue
+      if len(parts) > 1 and parts[-1].isdigit():
+        word, digits = ' '.join(parts[:-1]), parts[-1]
+      else:
+        word = ' '.join(parts)
+        digits = word_digits(word)
+      if digits:
+        loaded.setdefault(digits, []).append(word)
+  trie = PegTrie() if trie is None else trie
+  for digits, words in loaded.items():
+    # in file order, ahead of the existing words
+    for word in reversed(words):
+      trie.insert(digits, word, first=True)
+  return trie
+
+
+_DEFAULT = None
+
+
+def default_trie():
+  global _DEFAULT
+  if _DEFAULT is None:
+    _DEFAULT = PegTrie()
+  return _DEFAULT
+
+
+def encode(digits, trie=None):
+  '''
+  Split a digit string into the fewest peg words,
+  returns [(digits, word), ...]
+  '''
+  trie = default_trie() if trie is None else trie
+  digits = ''.join(c for c in str(digits) if c.isdigit())
+  n = len(digits)
+  inf = n + 1
+  # fewest words for digits[i:] and where its first word ends
+  count = [inf] * n + [0]
+  step = [0] * (n + 1)
+  for i in range(n - 1, -1, -1):
+    for end, _ in trie.matches(digits, i):
+      if count[end] + 1 <= count[i]:
+        # on ties the longer first word wins
+        count[i] = count[end] + 1
+        step[i] = end
+  if n and count[0] >= inf:
+    raise ValueError('The word list cannot encode every digit')
+  pegs = []
+  i = 0
+  while i < n:
+    end = step[i]
+    pegs.append((digits[i:end], trie.words(digits[i:end])[0]))
+    i = end
+  return pegs
+
+
+def peg(number, trie=None) -> str:
+  '''Peg word for a number, "42" -> "rain"'''
+  trie = default_trie() if trie is None else trie
+  words = trie.words(str(number))
+  if words:
+    return words[0]
+  return ' '.join(word for _, word in encode(number, trie))
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+  parser.add_argument('digits', nargs='?',
+                      help='the number, read from stdin when missing')
+  parser.add_argument('--words', default=None,
+                      help='extra word list, "word [digits]" per line')
+  args = parser.parse_args()
+  trie = load_words(args.words) if args.words else default_trie()
+  digits = args.digits if args.digits is not None else sys.stdin.read()
+  for chunk, word in encode(digits, trie):
+    print(f'{chunk:>8} {word}')
@@ -11,3 +11,8 @@ mm.addition(num_problems=5, pause=15, digits_1=1, digits_2=1)
 
 
 
+
+# or keep the routines and the days they run on in a
+# plan file, see plan.py
+#import plan
+#plan.compile_plan(plan.load('plan.json')).day().run()
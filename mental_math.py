@@ -9,6 +9,8 @@ from random import randrange
 from datetime import datetime
 from datetime import timedelta
 
+import major_system
+
 try:
   import androidhelper
   droid = androidhelper.Android()
@@ -273,45 +275,53 @@ def modulo(num_problems=10, pause=30,
 def pegs(num_problems=10,
          n_digits=2,
          pause=5):
-  #TODO give sounds/words not ready
+  '''Practice the major system peg of n digit numbers'''
   say('major system pegs')
-  smallest = 10**(n_digits-1)
+  smallest = 10**(n_digits-1) if n_digits > 1 else 0
   largest = 10**(n_digits)-1
   ns = randint(smallest,
-               largest,
+               largest + 1,
                (num_problems,))
   for n in ns:
-    say(f'Peg {n}')
+    number = str(n).zfill(n_digits)
+    say(f'Peg {number}')
     time.sleep(pause)
-    say(f'Pegged {n}')
+    say(f'{number} is {major_system.peg(number)}')
 
 def peg(num_problems=10,
         pause=5):
-  #TODO get working
+  '''
+  Practice pegging a 20 digit number two
+  digits at a time
+  '''
   say('major system pegs')
   for k in range(num_problems):
     ops = randint(0, 10, (10, 2))
     for x, y in ops:
-      say('Peg ' + str(x*10+y))
+      number = f'{x}{y}'
+      say(f'Peg {number}')
       time.sleep(pause)
+      say(f'{number} is {major_system.peg(number)}')
     say('The complete number is:')
     time.sleep(pause)
     digits = [f'{x} {y}' for x, y in ops]
     say(' '.join(digits))
 
 def memorize(num_problems=10,
-             pause=5):
-  #TODO get working
-  say('major system pegs')
+             pause=5, n_digits=20):
+  '''
+  Practice memorizing long numbers with the
+  fewest peg words
+  '''
+  say('major system memorize')
   for k in range(num_problems):
-    ops = randint(0, 10, (10, 2))
-    for x, y in ops:
-      say('Peg ' + str(x*10+y))
-      time.sleep(pause)
+    number = ''.join(str(d) for d in randint(0, 10, (n_digits,)))
+    words = major_system.encode(number)
+    say(' '.join(word for _, word in words))
+    time.sleep(pause)
     say('The complete number is:')
     time.sleep(pause)
-    digits = [f'{x} {y}' for x, y in ops]
-    say(' '.join(digits))
+    say(' '.join(number))
 
 if __name__ == '__main__':
   #pegs(1)
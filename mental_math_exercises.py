@@ -3,14 +3,19 @@ Scripts to practice some of the "Secrets
 of Mental Math" a book with techniques
 written by Arthur T. Benjamin
 '''
+import contextlib
+import functools
 import math
 from numpy.random import choice, randint
 import numpy as np
 import time
+import random
 from random import randrange
 from datetime import datetime
 from datetime import timedelta
 import json
+import queue
+import threading
 
 try:
   import androidhelper
@@ -18,6 +23,25 @@ try:
 except:
   droid = None
 
+@contextlib.contextmanager
+def seeded(seed):
+  '''
+  Seed the global numpy and random generators, which
+  generate_quiz draws from, and put their state back
+  afterwards so later unseeded draws stay random
+  '''
+  if seed is None:
+    yield
+    return
+  np_state, state = np.random.get_state(), random.getstate()
+  np.random.seed(seed)
+  random.seed(seed)
+  try:
+    yield
+  finally:
+    np.random.set_state(np_state)
+    random.setstate(state)
+
 def say(text):
   if droid is not None:
     droid.ttsSpeak(text)
@@ -28,6 +52,10 @@ def say(text):
     print(text)
 
 class ProblemInterface:
+  # no per instance __dict__, subclasses list their own attributes
+  __slots__ = ('pause',)
+  # args kept as uint8 digit rows, arg -> attribute holding the row
+  digit_rows = {}
 
   def __init__(self, pause, **kwargs):
     self.pause = pause
@@ -45,6 +73,14 @@ class ProblemInterface:
   def to_latex(self, **kwargs) -> (str, str):
     raise NotImplementedError("Inheriting class needs to implement this")
 
+  def expected_answer(self):
+    """The value match_answer accepts"""
+    return self.answer
+
+  def args(self) -> dict:
+    """Constructor arguments other than pause, to rebuild the problem"""
+    raise NotImplementedError("Inheriting class needs to implement this")
+
   def ask_pause_answer(self) -> None:
     """Ask aloud, pause, answer"""
     problem, answer = self.human_readable()
@@ -74,51 +110,454 @@ class ProblemInterface:
     return self.match_answer(your_answer)
 
 
+def problem_types():
+  """Problem classes by name, including the drills shipped in drills.py"""
+  # imported here as drills.py imports this module
+  import drills
+  types = {}
+  pending = ProblemInterface.__subclasses__()
+  while pending:
+    cls = pending.pop()
+    types[cls.__name__] = cls
+    pending.extend(cls.__subclasses__())
+  return types
+
+
+# bump when the html_quiz output changes so cached builds are redone
+HTML_RENDERER_VERSION = 1
+
+INTERACTIVE_TEMPLATE = '''<!DOCTYPE html>
+<html>
+<head>
+<title>__TITLE__</title>
+<meta charset="utf-8"/>
+<meta name="viewport" content="width=device-width, initial-scale=1"/>
+<style>
+  body { font-family: "Helvetica", "Arial", sans-serif; margin: 0.5em; }
+  #list { height: 80vh; overflow-y: auto; position: relative;
+          border: 1px solid #ccc; }
+  #spacer { position: relative; }
+  .row { position: absolute; left: 0; right: 0; height: __ROW_HEIGHT__px;
+         box-sizing: border-box; padding: 0.3em 0.5em;
+         border-bottom: 1px solid #eee; display: flex; align-items: center; }
+  .row span { flex: 1; }
+  .row input { width: 7em; font-size: 1em; }
+  .right { background: #dfd; }
+  .wrong { background: #fdd; }
+</style>
+</head>
+<body>
+<h2>__TITLE__</h2>
+<div id="list"><div id="spacer"></div></div>
+<p><button id="grade">Grade</button>
+<button id="save">Save results</button> <span id="score"></span></p>
+<script>
+var P = __PAYLOAD__;
+var H = __ROW_HEIGHT__, N = P.q.length;
+var given = new Array(N).fill(''), shown = new Array(N).fill(0),
+    times = new Array(N).fill(null), graded = null;
+var DAYS = ['sunday', 'monday', 'tuesday', 'wednesday', 'thursday',
+            'friday', 'saturday'];
+var list = document.getElementById('list'),
+    spacer = document.getElementById('spacer');
+spacer.style.height = (N * H) + 'px';
+
+function check(i) {
+  var s = given[i].trim().toLowerCase(), v = parseFloat(s);
+  if (P.kinds[P.k[i]] == 'DayOfTheWeek' && DAYS.indexOf(s) >= 0)
+    v = DAYS.indexOf(s);
+  if (isNaN(v)) return false;
+  return Math.abs(v - P.a[i]) <= Math.max(P.tol[i], 1e-9);
+}
+
+function row(i) {
+  var div = document.createElement('div');
+  div.className = 'row' + (graded ? (graded[i] ? ' right' : ' wrong') : '');
+  div.style.top = (i * H) + 'px';
+  var label = document.createElement('span');
+  label.textContent = (i + 1) + '. ' + P.q[i];
+  var input = document.createElement('input');
+  input.value = given[i];
+  input.dataset.i = i;
+  div.appendChild(label);
+  div.appendChild(input);
+  return div;
+}
+
+var first = -1, last = -1;
+function render() {
+  var a = Math.max(0, Math.floor(list.scrollTop / H) - 5);
+  var b = Math.min(N, Math.ceil((list.scrollTop + list.clientHeight) / H) + 5);
+  if (a == first && b == last) return;
+  var focused = document.activeElement && document.activeElement.dataset.i;
+  spacer.textContent = '';
+  for (var i = a; i < b; i++) spacer.appendChild(row(i));
+  first = a; last = b;
+  if (focused !== undefined) focus(+focused);
+}
+
+function focus(i) {
+  var input = spacer.querySelector('input[data-i="' + i + '"]');
+  if (input) input.focus({preventScroll: true});
+}
+
+list.addEventListener('scroll', render);
+spacer.addEventListener('focusin', function (e) {
+  var i = +e.target.dataset.i;
+  if (!shown[i]) shown[i] = performance.now();
+});
+spacer.addEventListener('input', function (e) {
+  var i = +e.target.dataset.i;
+  given[i] = e.target.value;
+  times[i] = (performance.now() - shown[i]) / 1000;
+});
+spacer.addEventListener('keydown', function (e) {
+  if (e.key != 'Enter') return;
+  var i = +e.target.dataset.i + 1;
+  if (i >= N) return;
+  if ((i + 1) * H > list.scrollTop + list.clientHeight)
+    list.scrollTop = (i + 1) * H - list.clientHeight;
+  render();
+  focus(i);
+});
+
+function summary() {
+  var answered = times.filter(function (t) { return t !== null; });
+  var correct = graded ? graded.filter(Boolean).length : 0;
+  var total = answered.reduce(function (s, t) { return s + t; }, 0);
+  return {quiz_date: new Date().toISOString(), problem_types: P.kinds,
+          problem_count: N, correct_count: correct, total_time: total,
+          mean_time: answered.length ? total / answered.length : 0,
+          correct: N ? correct / N : 0, graded: graded !== null,
+          times: times, answers: given};
+}
+
+document.getElementById('grade').onclick = function () {
+  graded = given.map(function (_, i) { return check(i); });
+  var s = summary();
+  document.getElementById('score').textContent =
+    s.correct_count + ' / ' + N + ' correct, ' +
+    s.mean_time.toFixed(1) + 's per answer';
+  first = last = -1;
+  render();
+};
+
+document.getElementById('save').onclick = function () {
+  var blob = new Blob([JSON.stringify(summary())], {type: 'application/json'});
+  var link = document.createElement('a');
+  link.href = URL.createObjectURL(blob);
+  link.download = 'results.json';
+  link.click();
+};
+
+render();
+</script>
+</body>
+</html>
+'''
+
+
+class ProblemView:
+  '''
+  Problems of a base sequence picked by an index array.
+  Views of views index the same base, nothing is copied.
+  '''
+  __slots__ = ('base', 'index')
+
+  def __init__(self, base, index=None):
+    if isinstance(base, ProblemView):
+      index = base.index if index is None else base.index[index]
+      base = base.base
+    elif index is None:
+      index = np.arange(len(base))
+    self.base = base
+    self.index = np.asarray(index, dtype=np.intp)
+
+  def __len__(self):
+    return len(self.index)
+
+  def __getitem__(self, k):
+    if isinstance(k, (int, np.integer)):
+      return self.base[int(self.index[k])]
+    return ProblemView(self.base, self.index[k])
+
+  def __iter__(self):
+    base = self.base
+    for k in self.index.tolist():
+      yield base[k]
+
+
 class Quiz:
 
-  def __init__(self, problems, log=None):#: list(ProblemInterface)
+  def __init__(self, problems, log=None, learner=None):#: list(ProblemInterface)
     self.problems = problems
     self.finished = False
     self.log = log
+    self.learner = learner
+    self.hooks = []
+    self.grades = []
+    self.times = []
+    self.types = []
+    self.sprint_stats = None
+    # whether worksheet asks for answers, None until it runs
+    self.graded = None
+
+  def __len__(self):
+    return len(self.problems)
+
+  def __getitem__(self, k):
+    """A problem, or a view quiz for a slice or index array"""
+    if isinstance(k, (int, np.integer)):
+      return self.problems[k]
+    return self.view(k)
+
+  def view(self, index):
+    """
+    New quiz over the problems at index, an array, slice
+    or boolean mask. It shares the problems and has its
+    own grades.
+    """
+    if isinstance(index, slice):
+      index = np.arange(len(self.problems))[index]
+    index = np.asarray(index)
+    if index.dtype == bool:
+      index = np.flatnonzero(index)
+    return Quiz(ProblemView(self.problems, index), log=self.log,
+                learner=self.learner)
+
+  def permute(self, seed=None):
+    """View with the problems shuffled, reproducible with a seed"""
+    order = np.random.default_rng(seed).permutation(len(self.problems))
+    return self.view(order)
+
+  def variants(self, count, seed=None):
+    """count shuffled views, e.g. one test per seat or per class"""
+    rng = np.random.default_rng(seed)
+    return [self.view(rng.permutation(len(self.problems)))
+            for _ in range(count)]
+
+  def of_type(self, *names):
+    """View keeping the problems of the named types"""
+    mask = [type(p).__name__ in names for p in self.problems]
+    return self.view(np.array(mask, dtype=bool))
+
+  @staticmethod
+  def concat(*quizzes):
+    """
+    One quiz with the problems of every quiz in order.
+    Views of the same problems stay a single index array,
+    otherwise the problems are gathered in a new list of
+    references.
+    """
+    views = [ProblemView(q.problems) for q in quizzes]
+    first = quizzes[0] if quizzes else Quiz([])
+    bases = []
+    for v in views:
+      if not any(v.base is b for b in bases):
+        bases.append(v.base)
+    if len(bases) == 1:
+      index = np.concatenate([v.index for v in views])
+      return Quiz(ProblemView(bases[0], index), log=first.log,
+                  learner=first.learner)
+    problems = []
+    for v in views:
+      problems.extend(v)
+    return Quiz(problems, log=first.log, learner=first.learner)
 
   def set_log(self, log=None):
     self.log = log
     return self
 
-  def worksheet(self, speak=True, grade=True, write=True, log=None) -> None:
-    grades = []
-    times = []
-    types = []
+  def set_learner(self, learner=None):
+    """Name recorded in the summary, used by leaderboards"""
+    self.learner = learner
+    return self
+
+  def add_hook(self, hook):
+    """
+    Observe worksheet() with an object defining any of
+    on_question(quiz, index, problem)
+    on_answer(quiz, index, problem, answer, correct, elapsed)
+    on_reveal(quiz, index, problem)
+    on_finish(quiz)
+    """
+    self.hooks.append(hook)
+    return self
+
+  def _emit(self, event, *args):
+    for hook in self.hooks:
+      handler = getattr(hook, event, None)
+      if handler is not None:
+        handler(self, *args)
+
+  def worksheet(self, speak=True, grade=True, write=True, log=None,
+                clock=None, read=None, start=0) -> None:
+    """
+    clock: object with time() and sleep(), defaults to the time module
+    read: callable returning the typed answer, defaults to input
+    start: continue from this problem keeping the earlier grades and
+      times, see checkpoint.py. grade must match the earlier run.
+    """
+    clock = time if clock is None else clock
+    read = input if read is None else read
+    grades = list(self.grades[:start]) if start else []
+    times = list(self.times[:start]) if start else []
+    if len(grades) != (start if grade else 0):
+      raise ValueError(f'{len(grades)} of the first {start} problems are '
+                       f'graded, cannot continue with grade={grade}')
+    self.graded = grade
+    types = [str(type(p).__name__) for p in self.problems[:start]]
     if log is not None:
       self.log = log
-    for problem in self.problems:
+    hooks = bool(self.hooks)
+    for k in range(start, len(self.problems)):
+      problem = self.problems[k]
       q, a = problem.human_readable()
       types.append(str(type(problem).__name__))
+      if hooks:
+        self._emit('on_question', k, problem)
       if speak:
         say(q)
       if write:
         print(q)
       if grade:
-        t1 = time.time()
-        answer = input()
-        t2 = time.time()
+        t1 = clock.time()
+        answer = read()
+        t2 = clock.time()
         grades.append(problem.match_answer(answer))
         times.append(t2 - t1)
+        if hooks:
+          self._emit('on_answer', k, problem, answer, grades[-1], times[-1])
       else:
-        time.sleep(problem.pause)
+        clock.sleep(problem.pause)
+      if hooks:
+        self._emit('on_reveal', k, problem)
       if speak:
         say(a)
       if write:
         print(a)
+    self.finish(grades, times, types)
+
+  @staticmethod
+  def _offer(ready, item, stop):
+    """Put item on ready unless stop is set first"""
+    while not stop.is_set():
+      try:
+        ready.put(item, timeout=0.05)
+        return True
+      except queue.Full:
+        pass
+    return False
+
+  @staticmethod
+  def _produce(source, ready, stop):
+    """
+    Fill ready with (problem, question, answer) until stop
+    is set. An error is passed on as (None, error, None).
+    """
+    try:
+      while not stop.is_set():
+        problems = source().problems
+        if len(problems) == 0:
+          raise ValueError('The sprint source returned an empty quiz')
+        for problem in problems:
+          item = (problem,) + problem.human_readable()
+          if not Quiz._offer(ready, item, stop):
+            return
+    except Exception as e:
+      Quiz._offer(ready, (None, e, None), stop)
+
+  @classmethod
+  def sprint(cls, source, seconds=60, speak=False, write=True, log=None,
+             learner=None, hooks=(), clock=None, read=None, buffer=64):
+    """
+    As many problems as can be answered in seconds.
+
+    source: callable returning a Quiz, e.g.
+      lambda: Multiplication.generate_quiz(20, 2, 1)
+    buffer: problems generated and rendered ahead of time by a
+      background thread, the answer loop only pops them
+      Errors raised by source are raised again here.
+
+    The quiz is finished after the first answer given past the
+    deadline. sprint_stats holds problems per minute and the worst
+    gap between an answer and the next question.
+    """
+    clock = time if clock is None else clock
+    read = input if read is None else read
+    quiz = cls([], log=log, learner=learner)
+    for hook in hooks:
+      quiz.add_hook(hook)
+    ready = queue.Queue(maxsize=buffer)
+    stop = threading.Event()
+    producer = threading.Thread(target=cls._produce,
+                                args=(source, ready, stop), daemon=True)
+    producer.start()
+    grades, times, types, gaps = [], [], [], []
+    hooks = bool(quiz.hooks)
+    try:
+      start = clock.time()
+      answered = start
+      k = 0
+      while clock.time() - start < seconds:
+        try:
+          problem, q, a = ready.get(timeout=0.05)
+        except queue.Empty:
+          # keep checking the deadline and the producer while waiting
+          if not producer.is_alive():
+            raise RuntimeError('The sprint producer stopped') from None
+          continue
+        if problem is None:
+          raise q
+        quiz.problems.append(problem)
+        if hooks:
+          quiz._emit('on_question', k, problem)
+        if speak:
+          say(q)
+        if write:
+          print(q)
+        t1 = clock.time()
+        gaps.append(t1 - answered)
+        answer = read()
+        answered = clock.time()
+        grades.append(problem.match_answer(answer))
+        times.append(answered - t1)
+        types.append(type(problem).__name__)
+        if hooks:
+          quiz._emit('on_answer', k, problem, answer, grades[-1], times[-1])
+          quiz._emit('on_reveal', k, problem)
+        if speak:
+          say(a)
+        if write:
+          print(a)
+        k += 1
+      elapsed = clock.time() - start
+    finally:
+      stop.set()
+      producer.join()
+    quiz.sprint_stats = {
+      "seconds": elapsed,
+      "per_minute": 60 * len(grades) / elapsed if elapsed else 0.0,
+      "worst_gap": max(gaps, default=0.0),
+      }
+    quiz.finish(grades, times, types)
+    return quiz
+
+  def finish(self, grades, times, types) -> None:
+    """Record the results, notify hooks and write the log"""
     self.grades = grades
     self.times = times
     self.types = types
     self.finished = True
+    # before the hooks, so they are not told of a quiz without a summary
+    summary = self.get_summary()
+    if self.hooks:
+      self._emit('on_finish')
     if self.log is not None:
       with open(self.log, 'a+') as f:
-        f.write(self.get_summary())
+        f.write(summary)
         f.write('\n')
-    print(self.get_summary())
+    print(summary)
 
 
   def html_quiz(self,
@@ -214,6 +653,30 @@ class Quiz:
     return qs, ans
 
 
+  def html_interactive(self, title='Mental Math Drill', row_height=48) -> str:
+    """
+    Return one offline HTML page that asks the problems,
+    records per-problem answer times and grades in the
+    browser. Only the rows scrolled into view are in the
+    DOM so very long drills stay responsive.
+    """
+    kinds = []
+    payload = {'kinds': kinds, 'k': [], 'q': [], 'a': [], 'tol': []}
+    for problem in self.problems:
+      kind = type(problem).__name__
+      if kind not in kinds:
+        kinds.append(kind)
+      q, _ = problem.human_readable()
+      payload['k'].append(kinds.index(kind))
+      payload['q'].append(q)
+      payload['a'].append(float(problem.expected_answer()))
+      payload['tol'].append(float(getattr(problem, 'abs_tol', 0)))
+    data = json.dumps(payload, separators=(',', ':')).replace('</', '<\\/')
+    page = INTERACTIVE_TEMPLATE.replace('__TITLE__', title)
+    page = page.replace('__ROW_HEIGHT__', str(int(row_height)))
+    return page.replace('__PAYLOAD__', data)
+
+
   def get_summary(self):
     if not self.finished:
       raise RuntimeError("Complete the worksheet before getting a summary")
@@ -225,6 +688,8 @@ class Quiz:
         "problem_count": len(self.problems),
         "graded": False
       }
+      if self.learner is not None:
+        summary["learner"] = self.learner
       return json.dumps(summary)
     summary = {
                 "quiz_date": datetime.now().isoformat(),
@@ -240,48 +705,54 @@ class Quiz:
                 "correct": float(np.mean(self.grades)),
                 "graded": True
               }
+    types = np.array(self.types)
+    if len(types) != len(self.grades):
+      # partially graded, which problems the grades belong to is unknown
+      types = types[:0]
+    by_type = {}
+    for t in np.unique(types):
+      mask = types == t
+      by_type[str(t)] = {
+        "problem_count": int(np.sum(mask)),
+        "correct_count": int(np.sum(np.array(self.grades)[mask])),
+        "mean_time": float(np.mean(np.array(self.times)[mask])),
+        }
+    summary["by_type"] = by_type
+    if self.sprint_stats is not None:
+      summary["sprint"] = self.sprint_stats
+    if self.learner is not None:
+      summary["learner"] = self.learner
     return json.dumps(summary)
 
 
+# lookup tables shared by every problem
+MONTHS = ('January', 'February',
+          'March', 'April', 'May',
+          'June', 'July', 'August',
+          'September', 'October',
+          'November', 'December')
+# 0 is sunday as in the answers of DayOfTheWeek
+WEEKDAY_NAMES = ('sunday', 'monday', 'tuesday', 'wednesday',
+                 'thursday', 'friday', 'saturday')
+WEEKDAY_NUMBERS = {name: k for k, name in enumerate(WEEKDAY_NAMES)}
+
+
 class DayOfTheWeek(ProblemInterface):
   '''
   Practice: given a date produce the day
   of the week
   '''
+  __slots__ = ('date_time', 'answer')
 
   def datetime_to_calendar(dt: datetime):
     '''Convert month day year'''
-    months = ['January', 'February',
-              'March', 'April', 'May',
-              'June', 'July', 'August',
-              'September', 'October',
-              'November', 'December']
-    month = months[dt.month-1]
-    return f'{month} {dt.day} {dt.year}'
+    return f'{MONTHS[dt.month-1]} {dt.day} {dt.year}'
 
   def weekday_to_name(day: int) -> str:
-    days = {
-      0: 'sunday',
-      1: 'monday',
-      2: 'tuesday',
-      3: 'wednesday',
-      4: 'thursday',
-      5: 'friday',
-      6: 'saturday',
-      }
-    return days[day]
+    return WEEKDAY_NAMES[day]
 
   def name_to_weekday(day: str) -> int:
-    days = {
-      'sunday': 0,
-      'monday': 1,
-      'tuesday': 2,
-      'wednesday': 3,
-      'thursday': 4,
-      'friday': 5,
-      'saturday': 6,
-      }
-    return days[day.lower()]
+    return WEEKDAY_NUMBERS[day.lower()]
 
   def random_date(start, end):
     """
@@ -310,6 +781,9 @@ class DayOfTheWeek(ProblemInterface):
     self.date_time = date_time
     self.answer = (self.date_time.weekday() + 1) % 7
 
+  def args(self) -> dict:
+    return {'date_time': self.date_time}
+
   def human_readable(self) -> (str, str):
     caldt = DayOfTheWeek.datetime_to_calendar(self.date_time)
     q = f'What day of the week was {caldt}?'
@@ -333,6 +807,7 @@ class FloatingHoliday(ProblemInterface):
   Practice: given a floating holiday and
   the year produce the day of the month
   '''
+  __slots__ = ('holiday', 'year', 'dt', 'calendar_date')
 
   holidays = {
     'Thanksgiving Day': {
@@ -354,6 +829,8 @@ class FloatingHoliday(ProblemInterface):
     'Canadian Thanksgiving Day': {
      'weekday': 1, 'week': 2, 'month': 10},
     }
+  # (holiday, year) -> (date, calendar text), there are only a few thousand
+  _dates = {}
 
   def floating_holiday(holiday, year):
     """
@@ -391,13 +868,7 @@ class FloatingHoliday(ProblemInterface):
 
   def datetime_to_calendar(dt: datetime):
     '''Convert month day year'''
-    months = ['January', 'February',
-              'March', 'April', 'May',
-              'June', 'July', 'August',
-              'September', 'October',
-              'November', 'December']
-    month = months[dt.month-1]
-    return f'{month} {dt.day} {dt.year}'
+    return f'{MONTHS[dt.month-1]} {dt.day} {dt.year}'
 
   def generate_quiz(num_problems,
                     start=1780,
@@ -418,9 +889,18 @@ class FloatingHoliday(ProblemInterface):
       super(FloatingHoliday, self).__init__(pause)
       self.holiday = holiday
       self.year = year
-      holiday = FloatingHoliday.holidays[self.holiday]
-      self.dt = FloatingHoliday.floating_holiday(holiday, year)
-      self.calendar_date = FloatingHoliday.datetime_to_calendar(self.dt)
+      key = (holiday, year)
+      dates = FloatingHoliday._dates.get(key)
+      if dates is None:
+        dt = FloatingHoliday.floating_holiday(
+          FloatingHoliday.holidays[holiday], year)
+        dates = (dt, FloatingHoliday.datetime_to_calendar(dt))
+        FloatingHoliday._dates[key] = dates
+      # shared by every problem for the same holiday and year
+      self.dt, self.calendar_date = dates
+
+  def args(self) -> dict:
+    return {'holiday': self.holiday, 'year': self.year}
 
   def human_readable(self) -> (str, str):
     h = f'{self.holiday} of {self.year}'
@@ -435,6 +915,9 @@ class FloatingHoliday(ProblemInterface):
         pass
     return self.dt.day == answer
 
+  def expected_answer(self):
+    return self.dt.day
+
   def to_latex(self) -> (str, str):
     return self.human_readable()
 
@@ -462,14 +945,20 @@ def vertical_problem(op1, op2, op, ans) -> (str, str):
 
 class Addition(ProblemInterface):
   '''Practice Addition'''
+  __slots__ = ('operand_1', 'operand_2', 'answer')
 
-  def generate_quiz(num_problems, digits_1=1, digits_2=1, pause=30):# -> Quiz:
+  def generate_quiz(num_problems, digits_1=1, digits_2=1, pause=30,
+                    seen=None):# -> Quiz:
     range1 = range(10**(digits_1-1), 10**digits_1)
     range2 = range(10**(digits_2-1), 10**digits_2)
-    x = choice(range1, (num_problems, ),
-               False if num_problems<(10**digits_1) else True)
-    y = choice(range2, (num_problems, ),
-               False if num_problems<(10**digits_2) else True)
+    if seen is not None:
+      x, y = seen.sample(f'Addition:{digits_1}x{digits_2}',
+                         (range1, range2), num_problems)
+    else:
+      x = choice(range1, (num_problems, ),
+                 False if num_problems<(10**digits_1) else True)
+      y = choice(range2, (num_problems, ),
+                 False if num_problems<(10**digits_2) else True)
     problems = []
     for a, b in zip(x, y):
       problems.append(Addition(a, b, pause))
@@ -481,6 +970,9 @@ class Addition(ProblemInterface):
       self.operand_2 = operand_2
       self.answer = operand_1 + operand_2
 
+  def args(self) -> dict:
+    return {'operand_1': self.operand_1, 'operand_2': self.operand_2}
+
   def human_readable(self) -> (str, str):
     problem = f'{self.operand_1} plus {self.operand_2}'
     q = f'What is {problem}'
@@ -506,14 +998,20 @@ class Addition(ProblemInterface):
 
 class Subtraction(ProblemInterface):
   '''Practice subtraction'''
+  __slots__ = ('operand_1', 'operand_2', 'answer')
 
-  def generate_quiz(num_problems, digits_1=1, digits_2=1, pause=30):# -> Quiz:
+  def generate_quiz(num_problems, digits_1=1, digits_2=1, pause=30,
+                    seen=None):# -> Quiz:
     range1 = range(10**(digits_1-1), 10**digits_1)
     range2 = range(10**(digits_2-1), 10**digits_2)
-    x = choice(range1, (num_problems, ),
-               False if num_problems<(10**digits_1) else True)
-    y = choice(range2, (num_problems, ),
-               False if num_problems<(10**digits_2) else True)
+    if seen is not None:
+      x, y = seen.sample(f'Subtraction:{digits_1}x{digits_2}',
+                         (range1, range2), num_problems)
+    else:
+      x = choice(range1, (num_problems, ),
+                 False if num_problems<(10**digits_1) else True)
+      y = choice(range2, (num_problems, ),
+                 False if num_problems<(10**digits_2) else True)
     problems = []
     for a, b in zip(x, y):
       problems.append(Subtraction(a, b, pause))
@@ -525,6 +1023,9 @@ class Subtraction(ProblemInterface):
       self.operand_2 = operand_2
       self.answer = operand_1 - operand_2
 
+  def args(self) -> dict:
+    return {'operand_1': self.operand_1, 'operand_2': self.operand_2}
+
   def human_readable(self) -> (str, str):
     problem = f'{self.operand_1} minus {self.operand_2}'
     q = f'What is {problem}'
@@ -550,14 +1051,20 @@ class Subtraction(ProblemInterface):
 
 class Multiplication(ProblemInterface):
   '''Practice multiplication'''
+  __slots__ = ('operand_1', 'operand_2', 'answer')
 
-  def generate_quiz(num_problems, digits_1=1, digits_2=1, pause=30):# -> Quiz:
+  def generate_quiz(num_problems, digits_1=1, digits_2=1, pause=30,
+                    seen=None):# -> Quiz:
     range1 = range(10**(digits_1-1), 10**digits_1)
     range2 = range(10**(digits_2-1), 10**digits_2)
-    x = choice(range1, (num_problems, ),
-               False if num_problems<(10**digits_1) else True)
-    y = choice(range2, (num_problems, ),
-               False if num_problems<(10**digits_2) else True)
+    if seen is not None:
+      x, y = seen.sample(f'Multiplication:{digits_1}x{digits_2}',
+                         (range1, range2), num_problems)
+    else:
+      x = choice(range1, (num_problems, ),
+                 False if num_problems<(10**digits_1) else True)
+      y = choice(range2, (num_problems, ),
+                 False if num_problems<(10**digits_2) else True)
     problems = []
     for a, b in zip(x, y):
       problems.append(Multiplication(a, b, pause))
@@ -569,6 +1076,9 @@ class Multiplication(ProblemInterface):
       self.operand_2 = operand_2
       self.answer = operand_1 * operand_2
 
+  def args(self) -> dict:
+    return {'operand_1': self.operand_1, 'operand_2': self.operand_2}
+
   def human_readable(self) -> (str, str):
     problem = f'{self.operand_1} times {self.operand_2}'
     q = f'What is {problem}'
@@ -594,14 +1104,20 @@ class Multiplication(ProblemInterface):
 
 class Division(ProblemInterface):
   '''Practice division'''
+  __slots__ = ('dividend', 'divisor', 'quotient')
 
-  def generate_quiz(num_problems, digits_1=1, digits_2=1, pause=30):# -> Quiz:
+  def generate_quiz(num_problems, digits_1=1, digits_2=1, pause=30,
+                    seen=None):# -> Quiz:
     range1 = range(10**(digits_1-1), 10**digits_1)
     range2 = range(10**(digits_2-1), 10**digits_2)
-    x = choice(range1, (num_problems, ),
-               False if num_problems<(10**digits_1) else True)
-    y = choice(range2, (num_problems, ),
-               False if num_problems<(10**digits_2) else True)
+    if seen is not None:
+      x, y = seen.sample(f'Division:{digits_1}x{digits_2}',
+                         (range1, range2), num_problems)
+    else:
+      x = choice(range1, (num_problems, ),
+                 False if num_problems<(10**digits_1) else True)
+      y = choice(range2, (num_problems, ),
+                 False if num_problems<(10**digits_2) else True)
     problems = []
     for a, b in zip(x, y):
       problems.append(Division(a, b, pause))
@@ -613,6 +1129,9 @@ class Division(ProblemInterface):
       self.divisor = divisor
       self.quotient = dividend / divisor
 
+  def args(self) -> dict:
+    return {'dividend': self.dividend, 'divisor': self.divisor}
+
   def human_readable(self) -> (str, str):
     problem = f'{self.dividend} divided by {self.divisor}'
     q = f'What is {problem}'
@@ -621,11 +1140,14 @@ class Division(ProblemInterface):
 
   def match_answer(self, answer) -> bool:
     try:
-      answer = int(answer)
+      answer = float(answer)
     except:
       pass
     return answer == self.quotient
 
+  def expected_answer(self):
+    return self.quotient
+
   def to_latex(self) -> (str, str):
     #TODO support long division notation
     q = f'{self.dividend} / {self.divisor}'
@@ -638,11 +1160,15 @@ class WholeRoots(ProblemInterface):
   Practice getting whole roots of n digit
   numbers
   '''
+  __slots__ = ('raised_value', 'power', 'answer')
 
-  def generate_quiz(num_problems, digits=2, n=2, pause=30):# -> Quiz:
+  def generate_quiz(num_problems, digits=2, n=2, pause=30, seen=None):# -> Quiz:
     rng = range(10**(digits-1), 10**digits)
-    x = choice(rng, (num_problems, ),
-               False if num_problems<(10**digits) else True)
+    if seen is not None:
+      x, = seen.sample(f'WholeRoots:{digits}:{n}', (rng,), num_problems)
+    else:
+      x = choice(rng, (num_problems, ),
+                 False if num_problems<(10**digits) else True)
     problems = []
     for a in x:
       problems.append(WholeRoots(a, n, pause))
@@ -654,6 +1180,9 @@ class WholeRoots(ProblemInterface):
       self.power = power
       self.answer = answer
 
+  def args(self) -> dict:
+    return {'answer': self.answer, 'power': self.power}
+
   def human_readable(self) -> (str, str):
     problem = f'{self.power} root of {self.raised_value}'
     q = f'What is the {problem}?'
@@ -675,11 +1204,16 @@ class WholeRoots(ProblemInterface):
 
 class Powers(ProblemInterface):
   '''Practice exponentiation'''
+  __slots__ = ('value', 'power', 'answer')
 
-  def generate_quiz(num_problems, digits=2, power=2, pause=30):  # -> Quiz:
+  def generate_quiz(num_problems, digits=2, power=2, pause=30,
+                    seen=None):  # -> Quiz:
     rng = range(10**(digits-1), 10**digits)
-    x = choice(rng, (num_problems,),
-               replace=False if num_problems < (10**digits) else True)
+    if seen is not None:
+      x, = seen.sample(f'Powers:{digits}:{power}', (rng,), num_problems)
+    else:
+      x = choice(rng, (num_problems,),
+                 replace=False if num_problems < (10**digits) else True)
     problems = []
     for a in x:
       problems.append(Powers(a, power, pause))
@@ -691,6 +1225,9 @@ class Powers(ProblemInterface):
       self.power = power
       self.answer = value ** power
 
+  def args(self) -> dict:
+    return {'value': self.value, 'power': self.power}
+
   def human_readable(self) -> (str, str):
     problem = f'{self.value} to the power of {self.power}'
     q = f'What is {problem}?'
@@ -715,11 +1252,16 @@ class Roots(ProblemInterface):
   Practice getting approximate roots of n
   digit numbers
   '''
+  __slots__ = ('raised_value', 'power', 'answer', 'abs_tol')
 
-  def generate_quiz(num_problems, digits=2, power=2, pause=30, abs_tol=0.1):  # -> Quiz:
+  def generate_quiz(num_problems, digits=2, power=2, pause=30, abs_tol=0.1,
+                    seen=None):  # -> Quiz:
     rng = range(10**(digits-1), 10**digits)
-    x = choice(rng, (num_problems,),
-               replace=False if num_problems < (10**digits) else True)
+    if seen is not None:
+      x, = seen.sample(f'Roots:{digits}:{power}', (rng,), num_problems)
+    else:
+      x = choice(rng, (num_problems,),
+                 replace=False if num_problems < (10**digits) else True)
     problems = []
     for a in x:
       problems.append(Roots(a, power, pause, abs_tol))
@@ -732,6 +1274,10 @@ class Roots(ProblemInterface):
       self.answer = raised_value ** (1.0 / power)
       self.abs_tol = abs_tol
 
+  def args(self) -> dict:
+    return {'raised_value': self.raised_value, 'power': self.power,
+            'abs_tol': self.abs_tol}
+
   def human_readable(self) -> (str, str):
     problem = f'{self.power} root of {self.raised_value}'
     q = f'What is the {problem}?'
@@ -753,11 +1299,16 @@ class Roots(ProblemInterface):
 
 class Modulo(ProblemInterface):
   '''Practice modulo'''
+  __slots__ = ('value', 'modulo', 'answer')
 
-  def generate_quiz(num_problems, digits=3, modulo=9, pause=30):  # -> Quiz:
+  def generate_quiz(num_problems, digits=3, modulo=9, pause=30,
+                    seen=None):  # -> Quiz:
     rng = range(10**(digits-1), 10**digits)
-    xs = choice(rng, (num_problems,),
-                replace=False if num_problems < (10**digits) else True)
+    if seen is not None:
+      xs, = seen.sample(f'Modulo:{digits}:{modulo}', (rng,), num_problems)
+    else:
+      xs = choice(rng, (num_problems,),
+                  replace=False if num_problems < (10**digits) else True)
     problems = []
     for v in xs:
       problems.append(Modulo(v, modulo, pause))
@@ -769,6 +1320,9 @@ class Modulo(ProblemInterface):
     self.modulo = modulo
     self.answer = value % modulo
 
+  def args(self) -> dict:
+    return {'value': self.value, 'modulo': self.modulo}
+
   def human_readable(self) -> (str, str):
     q = f'What is {self.value} mod {self.modulo}?'
     a = f'{self.value} mod {self.modulo} equals {self.answer}'
@@ -786,7 +1340,98 @@ class Modulo(ProblemInterface):
     a = f'{q} = {self.answer}'
     return q, a
 
-if __name__ == '__main__':
+class LongModulo(ProblemInterface):
+  '''
+  Practice casting out nines, elevens and small primes
+  on numbers of tens to hundreds of digits
+  '''
+  __slots__ = ('row', 'modulo', 'answer')
+  digit_rows = {'value': 'row'}
+
+  # cached, problems loaded one at a time share their weights
+  @functools.lru_cache(maxsize=64)
+  def weights(num_digits, modulo):
+    '''10**k % modulo for each digit position, most significant first'''
+    weights = np.empty(num_digits, dtype=np.int64)
+    w = 1 % modulo
+    for k in range(num_digits - 1, -1, -1):
+      weights[k] = w
+      w = w * 10 % modulo
+    weights.flags.writeable = False
+    return weights
+
+  def residues(digits, modulo):
+    '''Residue of every row of a uint8 digit matrix'''
+    largest = np.iinfo(np.int64).max
+    if modulo < 1 or 9 * (modulo - 1) > largest:
+      raise ValueError(f'The modulo must be from 1 to {largest // 9 + 1}')
+    weights = LongModulo.weights(digits.shape[1], modulo)
+    # as many digits per dot product as cannot overflow int64
+    chunk = largest // (9 * max(modulo - 1, 1))
+    total = np.zeros(digits.shape[0], dtype=np.int64)
+    for start in range(0, digits.shape[1], chunk):
+      part = digits[:, start:start+chunk].astype(np.int64)
+      total += (part @ weights[start:start+chunk]) % modulo
+      total %= modulo
+    return total
+
+  def generate_quiz(num_problems, digits=30, modulo=9, pause=30):# -> Quiz:
+    rows = randint(0, 10, (num_problems, digits), dtype=np.uint8)
+    rows[:, 0] = randint(1, 10, num_problems, dtype=np.uint8)
+    answers = LongModulo.residues(rows, modulo).tolist()
+    problems = []
+    for row, answer in zip(rows, answers):
+      problems.append(LongModulo(row, modulo, pause, answer))
+    return Quiz(problems)
+
+  def __init__(self, value, modulo, pause=30, answer=None):
+    '''
+    value: a non-negative int or digit string, or a row of
+      a uint8 matrix of digits
+    '''
+    super(LongModulo, self).__init__(pause)
+    if isinstance(value, np.ndarray):
+      if value.ndim != 1 or value.dtype != np.uint8:
+        raise ValueError('A digit row must be a 1 dimensional uint8 array')
+      row = value
+    else:
+      text = str(value)
+      if not (text.isascii() and text.isdigit()):
+        raise ValueError(f'{text!r} is not a non-negative whole number')
+      row = np.frombuffer(text.encode(), dtype=np.uint8) - ord('0')
+    self.row = row
+    self.modulo = modulo
+    if answer is None:
+      answer = int(LongModulo.residues(row[None, :], modulo)[0])
+    self.answer = answer
+
+  @property
+  def value(self) -> str:
+    '''The number as a digit string, rendered from the row'''
+    return (self.row + ord('0')).tobytes().decode()
+
+  def args(self) -> dict:
+    return {'value': self.value, 'modulo': self.modulo}
+
+  def human_readable(self) -> (str, str):
+    value = self.value
+    q = f'What is {value} mod {self.modulo}?'
+    a = f'{value} mod {self.modulo} equals {self.answer}'
+    return q, a
+
+  def match_answer(self, answer) -> bool:
+    try:
+      answer = int(answer)
+    except:
+      return False
+    return answer == self.answer
+
+  def to_latex(self) -> (str, str):
+    q = f'{self.value} \\bmod {self.modulo}'
+    a = f'{q} = {self.answer}'
+    return q, a
+
+def examples():
   # Example 1: Create an HTML worksheet (questions + answers)
   # Vertical addition worksheet auto-sized
   quiz_add = Addition.generate_quiz(num_problems=40, digits_1=2, digits_2=2, pause=3)
@@ -826,3 +1471,18 @@ if __name__ == '__main__':
   mod_quiz = Modulo.generate_quiz(num_problems=5, digits=4, modulo=9)
   print('Modulo quiz (enter remainder)...')
   mod_quiz.worksheet(speak=False, write=True, grade=True)
+
+
+if __name__ == '__main__':
+  import sys
+  if '--profile' in sys.argv:
+    # python mental_math_exercises.py --profile [prefix]
+    # profiling patches the imported module, not __main__
+    import mental_math_exercises
+    from profiling import profiled
+    k = sys.argv.index('--profile')
+    prefix = sys.argv[k+1] if len(sys.argv) > k+1 else 'mental_math_exercises'
+    with profiled(prefix):
+      mental_math_exercises.examples()
+  else:
+    examples()
@@ -0,0 +1,106 @@
+'''
+Prometheus text format exporter for quiz sessions
+
+  exporter = PrometheusExporter('quiz.prom')
+  quiz.add_hook(exporter).worksheet()
+
+The file can be picked up by the node exporter
+textfile collector, or pass url= to push the metrics
+to a Pushgateway.
+'''
+import os
+import time
+import urllib.request
+from bisect import bisect_left
+
+# answer latency histogram bucket upper bounds in seconds
+BUCKETS = (0.5, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+
+class PrometheusExporter:
+  '''Quiz hook collecting counters and latency histograms'''
+
+  def __init__(self, path=None, url=None, min_interval=1.0,
+               buckets=BUCKETS):
+    self.path = path
+    self.url = url
+    self.min_interval = min_interval
+    self.buckets = tuple(buckets)
+    self.questions = {}
+    self.answers = {}
+    self.reveals = {}
+    self.finished = 0
+    # type -> [bucket counts..., +Inf count], sum
+    self.histogram = {}
+    self.latency_sum = {}
+    self.last_write = 0.0
+
+  def on_question(self, quiz, index, problem):
+    kind = type(problem).__name__
+    self.questions[kind] = self.questions.get(kind, 0) + 1
+
+  def on_answer(self, quiz, index, problem, answer, correct, elapsed):
+    kind = type(problem).__name__
+    key = (kind, bool(correct))
+    self.answers[key] = self.answers.get(key, 0) + 1
+    counts = self.histogram.get(kind)
+    if counts is None:
+      counts = self.histogram[kind] = [0] * (len(self.buckets) + 1)
+    counts[bisect_left(self.buckets, elapsed)] += 1
+    self.latency_sum[kind] = self.latency_sum.get(kind, 0.0) + elapsed
+    now = time.monotonic()
+    if now - self.last_write >= self.min_interval:
+      self.last_write = now
+      self.export()
+
+  def on_reveal(self, quiz, index, problem):
+    kind = type(problem).__name__
+    self.reveals[kind] = self.reveals.get(kind, 0) + 1
+
+  def on_finish(self, quiz):
+    self.finished += 1
+    self.export()
+
+  def render(self) -> str:
+    '''Metrics in the Prometheus text exposition format'''
+    lines = ['# TYPE mental_math_questions_total counter']
+    for kind, n in sorted(self.questions.items()):
+      lines.append(f'mental_math_questions_total{{type="{kind}"}} {n}')
+    lines.append('# TYPE mental_math_answers_total counter')
+    for (kind, correct), n in sorted(self.answers.items()):
+      c = 'true' if correct else 'false'
+      lines.append(
+        f'mental_math_answers_total{{type="{kind}",correct="{c}"}} {n}')
+    lines.append('# TYPE mental_math_reveals_total counter')
+    for kind, n in sorted(self.reveals.items()):
+      lines.append(f'mental_math_reveals_total{{type="{kind}"}} {n}')
+    lines.append('# TYPE mental_math_quizzes_finished_total counter')
+    lines.append(f'mental_math_quizzes_finished_total {self.finished}')
+    lines.append('# TYPE mental_math_answer_seconds histogram')
+    for kind, counts in sorted(self.histogram.items()):
+      total = 0
+      for bound, n in zip(self.buckets + ('+Inf',), counts):
+        total += n
+        lines.append(f'mental_math_answer_seconds_bucket'
+                     f'{{type="{kind}",le="{bound}"}} {total}')
+      lines.append(f'mental_math_answer_seconds_sum{{type="{kind}"}} '
+                   f'{self.latency_sum[kind]}')
+      lines.append(f'mental_math_answer_seconds_count{{type="{kind}"}} '
+                   f'{total}')
+    return '\n'.join(lines) + '\n'
+
+  def export(self) -> None:
+    '''Write to the file and/or push to the url'''
+    text = self.render()
+    if self.path is not None:
+      tmp = self.path + '.tmp'
+      with open(tmp, 'w') as f:
+        f.write(text)
+      os.replace(tmp, self.path)
+    if self.url is not None:
+      request = urllib.request.Request(self.url, data=text.encode(),
+                                       method='PUT')
+      try:
+        urllib.request.urlopen(request, timeout=2).close()
+      except OSError as e:
+        print(f'Could not push metrics to {self.url}: {e}')
@@ -0,0 +1,235 @@
+'''
+Declarative daily practice plans
+
+A plan is a JSON file of named routines and the days
+they are practiced on:
+
+  {"routines": {
+     "calendar": [
+       {"type": "DayOfTheWeek", "params": {"num_problems": 10, "pause": 20}},
+       {"type": "FloatingHoliday", "params": {"num_problems": 10}}],
+     "arithmetic": [
+       {"type": "Multiplication",
+        "params": {"num_problems": 10, "digits_1": 2, "digits_2": 1,
+                   "pause": 10},
+        "seed": 7}]},
+   "schedule": {
+     "daily": ["calendar"],
+     "monday": ["arithmetic"],
+     "2026-12-24": ["arithmetic"]}}
+
+Schedule keys are "daily", weekday names or ISO dates
+and a day gets the routines of every key matching it.
+The plan is checked against the generate_quiz
+signature of each problem type when it is compiled,
+and all of a day's problems are generated before the
+first question is asked.
+
+  session = compile_plan(load('plan.json')).day()
+  session.run(speak=False)
+
+  python plan.py plan.json [--date 2026-10-19] [--check]
+'''
+import argparse
+import inspect
+import json
+from datetime import date, datetime
+
+from mental_math_exercises import Quiz, problem_types, say, seeded
+
+WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday',
+            'saturday', 'sunday')
+
+
+class PlanError(ValueError):
+  pass
+
+
+class Block:
+  '''One validated problem type entry of a routine'''
+
+  def __init__(self, cls, params, seed=None):
+    self.cls = cls
+    self.params = params
+    self.seed = seed
+
+  def generate(self):
+    with seeded(self.seed):
+      return self.cls.generate_quiz(**self.params).problems
+
+
+def _param(value, default, where):
+  '''value checked against the type of its generate_quiz default'''
+  if isinstance(default, bool):
+    ok = isinstance(value, bool)
+    kind = 'true or false'
+  elif isinstance(default, int):
+    ok = isinstance(value, int) and not isinstance(value, bool)
+    kind = 'an integer'
+  elif isinstance(default, float):
+    ok = isinstance(value, (int, float)) and not isinstance(value, bool)
+    kind = 'a number'
+  elif isinstance(default, datetime):
+    try:
+      return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+      raise PlanError(f'{where}: expected an ISO date, got {value!r}') from None
+  else:
+    return value
+  if not ok:
+    raise PlanError(f'{where}: expected {kind}, got {value!r}')
+  return value
+
+
+def _block(entry, where, types):
+  if not isinstance(entry, dict) or 'type' not in entry:
+    raise PlanError(f'{where}: expected an object with a "type"')
+  unknown = set(entry) - {'type', 'params', 'seed'}
+  if unknown:
+    raise PlanError(f'{where}: unknown keys {sorted(unknown)}')
+  cls = types.get(entry['type'])
+  if cls is None:
+    raise PlanError(f'{where}: unknown problem type {entry["type"]!r}')
+  params = entry.get('params', {})
+  if not isinstance(params, dict):
+    raise PlanError(f'{where}: "params" must be an object')
+  if 'seen' in params:
+    raise PlanError(f'{where}.params.seen: seen facts cannot be set in a plan')
+  signature = inspect.signature(cls.generate_quiz)
+  try:
+    bound = signature.bind(**params)
+  except TypeError as e:
+    raise PlanError(f'{where}: {entry["type"]}.generate_quiz {e}') from None
+  checked = {}
+  for name, value in params.items():
+    default = signature.parameters[name].default
+    if name == 'pause':
+      # pauses may be fractions of a second
+      default = 0.0
+    checked[name] = _param(value, default, f'{where}.params.{name}')
+  params = checked
+  bound = signature.bind(**params)
+  bound.apply_defaults()
+  count = bound.arguments.get('num_problems')
+  if not isinstance(count, int) or count < 1:
+    raise PlanError(f'{where}: num_problems must be a positive integer')
+  pause = bound.arguments.get('pause', 0)
+  if not isinstance(pause, (int, float)) or pause < 0:
+    raise PlanError(f'{where}: pause must be a number of seconds')
+  seed = entry.get('seed')
+  if seed is not None and not isinstance(seed, int):
+    raise PlanError(f'{where}: seed must be an integer')
+  return Block(cls, params, seed)
+
+
+def _schedule_key(key, where):
+  if key == 'daily' or key in WEEKDAYS:
+    return key
+  try:
+    return date.fromisoformat(key).isoformat()
+  except ValueError:
+    raise PlanError(f'{where}: expected "daily", a weekday or an ISO date,'
+                    f' got {key!r}') from None
+
+
+class Plan:
+
+  def __init__(self, routines, schedule):
+    '''
+    routines: name -> list of Block
+    schedule: "daily", weekday or ISO date -> list of routine names
+    '''
+    self.routines = routines
+    self.schedule = schedule
+
+  def routines_for(self, day=None):
+    '''Names of the routines practiced on day, in plan order'''
+    day = date.today() if day is None else day
+    keys = ('daily', WEEKDAYS[day.weekday()], day.isoformat())
+    names = []
+    for key in keys:
+      for name in self.schedule.get(key, []):
+        if name not in names:
+          names.append(name)
+    return names
+
+  def day(self, day=None):
+    '''Generate every problem of day up front'''
+    day = date.today() if day is None else day
+    quizzes = []
+    for name in self.routines_for(day):
+      problems = []
+      for block in self.routines[name]:
+        problems.extend(block.generate())
+      quizzes.append((name, Quiz(problems)))
+    return Session(day, quizzes)
+
+
+def compile_plan(plan):
+  '''Validate a plan dict and resolve its problem types'''
+  if not isinstance(plan, dict):
+    raise PlanError('A plan must be a JSON object')
+  unknown = set(plan) - {'routines', 'schedule'}
+  if unknown:
+    raise PlanError(f'Unknown plan keys {sorted(unknown)}')
+  types = problem_types()
+  routines = {}
+  for name, entries in plan.get('routines', {}).items():
+    if not isinstance(entries, list) or not entries:
+      raise PlanError(f'routines.{name}: expected a non empty list')
+    routines[name] = [_block(entry, f'routines.{name}[{k}]', types)
+                      for k, entry in enumerate(entries)]
+  schedule = {}
+  for key, names in plan.get('schedule', {}).items():
+    where = f'schedule.{key}'
+    if not isinstance(names, list):
+      raise PlanError(f'{where}: expected a list of routine names')
+    for name in names:
+      if name not in routines:
+        raise PlanError(f'{where}: unknown routine {name!r}')
+    schedule.setdefault(_schedule_key(key, where), []).extend(names)
+  return Plan(routines, schedule)
+
+
+def load(path):
+  with open(path) as f:
+    return json.load(f)
+
+
+class Session:
+  '''A day's pre-generated quizzes, one per routine'''
+
+  def __init__(self, day, quizzes):
+    self.day = day
+    self.quizzes = quizzes
+
+  def __len__(self):
+    return sum(len(quiz.problems) for _, quiz in self.quizzes)
+
+  def run(self, hooks=(), **kwargs):
+    '''Run the routines in order, kwargs go to Quiz.worksheet'''
+    for name, quiz in self.quizzes:
+      for hook in hooks:
+        quiz.add_hook(hook)
+      if kwargs.get('speak', True):
+        say(name)
+      quiz.worksheet(**kwargs)
+    return self
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+  parser.add_argument('plan')
+  parser.add_argument('--date', type=date.fromisoformat, default=None)
+  parser.add_argument('--check', action='store_true',
+                      help='validate and list the day without practicing')
+  parser.add_argument('--log', default=None)
+  parser.add_argument('--no-grade', dest='grade', action='store_false')
+  parser.add_argument('--no-speak', dest='speak', action='store_false')
+  args = parser.parse_args()
+  session = compile_plan(load(args.plan)).day(args.date)
+  if args.check:
+    for name, quiz in session.quizzes:
+      print(f'{name}: {len(quiz.problems)} problems')
+  else:
+    session.run(speak=args.speak, grade=args.grade, log=args.log)
@@ -0,0 +1,209 @@
+'''
+Precomputed problem banks
+
+A bank holds every problem of a fixed fact space,
+e.g. all 2 digit by 2 digit multiplications, with
+its answer and difficulty columns. It is written
+once as a .npy file and opened with a memory map so
+quizzes are drawn by index from zero-copy slices
+that separate processes share read-only.
+
+  python problem_bank.py Multiplication mult_2x2.npy digits_1=2 digits_2=2
+'''
+import json
+import sys
+
+import numpy as np
+
+import difficulty
+from mental_math_exercises import (Quiz, Addition, Subtraction,
+                                   Multiplication, Division, Powers,
+                                   WholeRoots, FloatingHoliday)
+
+BANK_VERSION = 1
+
+COLUMNS = [('operand_1', np.int64),
+           ('operand_2', np.int64),
+           ('answer', np.float64)]
+COLUMNS += [(name, np.int64) for name in difficulty.FEATURES]
+BANK_DTYPE = np.dtype(COLUMNS)
+
+
+def _digit_range(digits):
+  return np.arange(10**(digits-1), 10**digits, dtype=np.int64)
+
+
+def _pairs(digits_1, digits_2):
+  x, y = np.meshgrid(_digit_range(digits_1), _digit_range(digits_2),
+                     indexing='ij')
+  return x.ravel(), y.ravel()
+
+
+def _check_int64(digits, power=1):
+  if digits * power > 18:
+    raise ValueError('Answers would overflow a 64 bit integer')
+
+
+def binary_space(kind, digits_1=2, digits_2=2):
+  '''Every pair of operands for one of the arithmetic problems'''
+  x, y = _pairs(digits_1, digits_2)
+  if kind == 'Addition':
+    answer = x + y
+  elif kind == 'Subtraction':
+    answer = x - y
+  elif kind == 'Multiplication':
+    _check_int64(digits_1 + digits_2)
+    answer = x * y
+  elif kind == 'Division':
+    answer = x / y
+  else:
+    raise ValueError(f'{kind} is not a two operand problem')
+  return x, y, answer
+
+
+def powers_space(digits=2, power=2):
+  '''Every value with the given number of digits raised to power'''
+  _check_int64(digits, power)
+  x = _digit_range(digits)
+  return x, np.full_like(x, power), x ** power
+
+
+def whole_roots_space(digits=2, n=2):
+  '''Every whole n root with the given number of digits'''
+  _check_int64(digits, n)
+  x = _digit_range(digits)
+  return x ** n, np.full_like(x, n), x
+
+
+def floating_holiday_space(start=1780, end=2050):
+  '''
+  Every (holiday, year) pair, operand_1 indexes
+  FloatingHoliday.holidays and the answer is the day
+  of the month
+  '''
+  names = list(FloatingHoliday.holidays.keys())
+  h, y = np.meshgrid(np.arange(len(names)), np.arange(start, end),
+                     indexing='ij')
+  h = h.ravel()
+  y = y.ravel()
+  day = [FloatingHoliday.floating_holiday(FloatingHoliday.holidays[names[a]],
+                                          int(b)).day
+         for a, b in zip(h, y)]
+  return h, y, np.array(day, dtype=np.float64)
+
+
+SPACES = {
+  'Addition': lambda **kw: binary_space('Addition', **kw),
+  'Subtraction': lambda **kw: binary_space('Subtraction', **kw),
+  'Multiplication': lambda **kw: binary_space('Multiplication', **kw),
+  'Division': lambda **kw: binary_space('Division', **kw),
+  'Powers': powers_space,
+  'WholeRoots': whole_roots_space,
+  'FloatingHoliday': floating_holiday_space,
+  }
+
+
+def n_root(value, n):
+  return int(round(value ** (1.0 / n)))
+
+
+CONSTRUCTORS = {
+  'Addition': Addition,
+  'Subtraction': Subtraction,
+  'Multiplication': Multiplication,
+  'Division': Division,
+  'Powers': Powers,
+  'WholeRoots': lambda x, n, pause: WholeRoots(n_root(x, n), n, pause),
+  'FloatingHoliday':
+    lambda h, y, pause: FloatingHoliday(
+      list(FloatingHoliday.holidays.keys())[h], y, pause),
+  }
+
+
+def build_bank(path, kind, **params):
+  '''Write the full fact space of kind to path, returns the bank'''
+  if kind not in SPACES:
+    raise ValueError(f'No fact space for {kind}')
+  x, y, answer = SPACES[kind](**params)
+  if kind == 'WholeRoots':
+    features = difficulty.operand_features(kind, answer, y)
+  elif kind == 'FloatingHoliday':
+    features = np.zeros(len(x), dtype=difficulty.FEATURE_DTYPE)
+  else:
+    features = difficulty.operand_features(kind, x, y)
+  data = np.lib.format.open_memmap(path, mode='w+', dtype=BANK_DTYPE,
+                                   shape=(len(x),))
+  data['operand_1'] = x
+  data['operand_2'] = y
+  data['answer'] = answer
+  for name in difficulty.FEATURES:
+    data[name] = features[name]
+  data.flush()
+  del data
+  with open(path + '.json', 'w') as f:
+    json.dump({'version': BANK_VERSION, 'kind': kind, 'params': params}, f)
+  return ProblemBank(path)
+
+
+class ProblemBank:
+  '''Read-only memory mapped view of a bank file'''
+
+  def __init__(self, path):
+    with open(path + '.json') as f:
+      meta = json.load(f)
+    if meta['version'] != BANK_VERSION:
+      raise ValueError(f'Unsupported bank version {meta["version"]}')
+    self.path = path
+    self.kind = meta['kind']
+    self.params = meta['params']
+    self.data = np.load(path, mmap_mode='r')
+
+  def __len__(self):
+    return len(self.data)
+
+  def __getitem__(self, index):
+    return self.data[index]
+
+  def score(self, weights=None):
+    return difficulty.score(self.data, weights)
+
+  def problems(self, index, pause=30):
+    '''Problem objects for the rows at index'''
+    rows = self.data[index]
+    make = CONSTRUCTORS[self.kind]
+    return [make(int(a), int(b), pause)
+            for a, b in zip(rows['operand_1'], rows['operand_2'])]
+
+  def quiz(self, index, pause=30):
+    return Quiz(self.problems(index, pause))
+
+  def sample(self, num_problems, pause=30, seed=None, low=None, high=None):
+    '''
+    Draw a quiz of distinct rows, optionally limited to
+    difficulty scores in [low, high]
+    '''
+    rng = np.random.default_rng(seed)
+    candidates = np.arange(len(self.data))
+    if low is not None or high is not None:
+      s = self.score()
+      keep = np.ones(len(s), dtype=bool)
+      if low is not None:
+        keep &= s >= low
+      if high is not None:
+        keep &= s <= high
+      candidates = candidates[keep]
+    if len(candidates) == 0:
+      raise ValueError('No problems in the requested difficulty range')
+    index = rng.choice(candidates, num_problems,
+                       replace=num_problems > len(candidates))
+    return self.quiz(index, pause)
+
+
+if __name__ == '__main__':
+  kind, path = sys.argv[1], sys.argv[2]
+  params = {}
+  for arg in sys.argv[3:]:
+    key, value = arg.split('=')
+    params[key] = int(value)
+  bank = build_bank(path, kind, **params)
+  print(f'Saved {len(bank)} {kind} problems to {path}')
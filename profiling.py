@@ -0,0 +1,178 @@
+'''
+Profiling mode for the generation and rendering code
+
+  with profiled('out/build'):
+    build.build('catalog.json', 'worksheets/', jobs=1)
+
+writes
+  out/build.prof        cProfile stats (snakeviz, pstats)
+  out/build.collapsed   sampled stacks for flamegraph.pl,
+                        speedscope, etc.
+  out/build.stages.json per stage wall time, call count
+                        and tracemalloc peak
+
+Stages are the problem classes' generate_quiz,
+constructors and to_latex, and Quiz.html_quiz. Stage
+times are inclusive, html_quiz includes its to_latex
+calls. Memory peaks are measured on the outermost
+stage call only.
+'''
+import contextlib
+import cProfile
+import functools
+import json
+import sys
+import threading
+import time
+import tracemalloc
+
+from mental_math_exercises import Quiz, problem_types
+
+
+class Stage:
+
+  def __init__(self, name):
+    self.name = name
+    self.calls = 0
+    self.wall = 0.0
+    self.peak = 0
+
+  def as_dict(self):
+    return {'calls': self.calls, 'wall_time': self.wall,
+            'peak_bytes': self.peak}
+
+
+class StackSampler(threading.Thread):
+  '''Samples the stack of one thread into collapsed stack counts'''
+
+  def __init__(self, thread_id, interval=0.001):
+    super(StackSampler, self).__init__(daemon=True)
+    self.thread_id = thread_id
+    self.interval = interval
+    self.counts = {}
+    self.running = True
+
+  def run(self):
+    while self.running:
+      frame = sys._current_frames().get(self.thread_id)
+      stack = []
+      while frame is not None:
+        code = frame.f_code
+        stack.append(f'{code.co_name} '
+                     f'({code.co_filename}:{code.co_firstlineno})')
+        frame = frame.f_back
+      if stack:
+        key = ';'.join(reversed(stack))
+        self.counts[key] = self.counts.get(key, 0) + 1
+      time.sleep(self.interval)
+
+  def stop(self):
+    self.running = False
+    self.join()
+
+  def collapsed(self) -> str:
+    return ''.join(f'{stack} {n}\n' for stack, n in self.counts.items())
+
+
+class Profiler:
+
+  def __init__(self, prefix, interval=0.001):
+    self.prefix = prefix
+    self.interval = interval
+    self.stages = {}
+    self.depth = 0
+    self.patched = []
+    self.profile = cProfile.Profile()
+    self.sampler = None
+    self.wall = 0.0
+    self.peak = 0
+
+  def _wrap(self, owner, attr, stage_name):
+    original = owner.__dict__[attr]
+    stage = self.stages.setdefault(stage_name, Stage(stage_name))
+    profiler = self
+
+    method = getattr(original, '__func__', None)
+    wrapped = original if method is None else method
+
+    @functools.wraps(wrapped)
+    def wrapper(*args, **kwargs):
+      outer = profiler.depth == 0
+      if outer:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+      profiler.depth += 1
+      t1 = time.perf_counter()
+      try:
+        return wrapped(*args, **kwargs)
+      finally:
+        stage.wall += time.perf_counter() - t1
+        stage.calls += 1
+        profiler.depth -= 1
+        if outer:
+          peak = tracemalloc.get_traced_memory()[1] - base
+          stage.peak = max(stage.peak, peak)
+    self.patched.append((owner, attr, original))
+    # keep classmethods and staticmethods working
+    setattr(owner, attr, wrapper if method is None else type(original)(wrapper))
+
+  def start(self):
+    for cls in problem_types().values():
+      if 'generate_quiz' in cls.__dict__:
+        self._wrap(cls, 'generate_quiz', 'generate_quiz')
+      if '__init__' in cls.__dict__:
+        self._wrap(cls, '__init__', 'constructor')
+      if 'to_latex' in cls.__dict__:
+        self._wrap(cls, 'to_latex', 'to_latex')
+    self._wrap(Quiz, 'html_quiz', 'html_quiz')
+    tracemalloc.start()
+    self.sampler = StackSampler(threading.get_ident(), self.interval)
+    self.sampler.start()
+    self.wall = time.perf_counter()
+    self.profile.enable()
+
+  def stop(self):
+    self.profile.disable()
+    self.wall = time.perf_counter() - self.wall
+    self.sampler.stop()
+    self.peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    for owner, attr, original in reversed(self.patched):
+      setattr(owner, attr, original)
+    self.patched = []
+
+  def summary(self):
+    return {
+      'wall_time': self.wall,
+      'peak_bytes': self.peak,
+      'stages': {name: s.as_dict() for name, s in self.stages.items()
+                 if s.calls},
+      }
+
+  def write(self):
+    self.profile.dump_stats(self.prefix + '.prof')
+    with open(self.prefix + '.collapsed', 'w') as f:
+      f.write(self.sampler.collapsed())
+    with open(self.prefix + '.stages.json', 'w') as f:
+      json.dump(self.summary(), f, indent=1)
+
+  def report(self) -> str:
+    lines = [f'total {self.wall:.3f}s, peak {self.peak / 1e6:.1f}MB']
+    for name, s in self.stages.items():
+      if s.calls:
+        lines.append(f'  {name:14} {s.wall:8.3f}s {s.calls:8d} calls '
+                     f'{s.peak / 1e6:8.1f}MB peak')
+    return '\n'.join(lines)
+
+
+@contextlib.contextmanager
+def profiled(prefix, interval=0.001):
+  '''Profile the body, write the result files and print a report'''
+  profiler = Profiler(prefix, interval)
+  profiler.start()
+  try:
+    yield profiler
+  finally:
+    profiler.stop()
+    profiler.write()
+    print(profiler.report())
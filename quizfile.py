@@ -0,0 +1,323 @@
+'''
+Compact binary files for quizzes and their results
+
+  save(quiz, 'class_test.mmq')
+  quiz = load('class_test.mmq')
+
+Layout, all little endian:
+
+  b'MMQZ', u16 version, u16 0, u32 header length
+  header JSON, padded to a 64 byte boundary
+  columns, each starting on a 64 byte boundary
+
+The header names the problem types and, per type,
+the constructor arguments and how each one is stored.
+Columns hold one row per problem:
+
+  type    uint8    index into the header's types
+  pause   float64
+  ints    int64    (n, width) integer, datetime (epoch
+                   seconds) and string table arguments,
+                   and the lengths of digit row arguments
+  floats  float64  (n, width) float arguments
+  digits  uint8    (n, width) digit row arguments, such as
+                   the numbers of LongModulo, each zero
+                   padded on the left to a width per type
+  grades  int8     1 right, 0 wrong, -1 not graded
+  times   float64  seconds to answer, nan if not graded
+
+load() memory maps the columns and builds problem
+objects only when they are accessed, columns_of()
+reads a type's arguments as arrays without building
+any.
+'''
+import json
+import operator
+import struct
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from mental_math_exercises import Quiz, problem_types
+
+MAGIC = b'MMQZ'
+VERSION = 2
+ALIGN = 64
+EPOCH = datetime(1970, 1, 1)
+
+_PREFIX = struct.Struct('<4sHHI')
+
+
+def _kind_of(value):
+  if isinstance(value, datetime):
+    return 'd'
+  if isinstance(value, str):
+    return 's'
+  if isinstance(value, (float, np.floating)):
+    return 'f'
+  return 'i'
+
+
+def _pad(n):
+  return -n % ALIGN
+
+
+def _layout(problems):
+  '''
+  Per type argument layout, the type code of every
+  problem and the column widths
+  '''
+  classes = list(map(type, problems))
+  codes = {cls: k for k, cls in enumerate(dict.fromkeys(classes))}
+  if len(codes) > 255:
+    raise ValueError('A quiz file holds at most 255 problem types')
+  type_codes = np.fromiter(map(codes.__getitem__, classes), dtype=np.uint8,
+                           count=len(classes))
+  types = {}
+  for cls, code in codes.items():
+    args = problems[classes.index(cls)].args()
+    kinds = [_kind_of(v) for v in args.values()]
+    digits = []
+    offset = 0
+    for k, arg in enumerate(args):
+      if arg in cls.digit_rows:
+        kinds[k] = 'r'
+        rows = map(operator.attrgetter(cls.digit_rows[arg]),
+                   (p for p, c in zip(problems, classes) if c is cls))
+        width = max(map(len, rows))
+        digits.append([offset, width])
+        offset += width
+    types[cls.__name__] = {'args': list(args), 'kinds': kinds,
+                           'strings': [], 'digits': digits}
+  int_width = max([sum(k != 'f' for k in t['kinds']) for t in types.values()],
+                  default=0)
+  float_width = max([sum(k == 'f' for k in t['kinds'])
+                     for t in types.values()], default=0)
+  digit_width = max([sum(w for _, w in t['digits']) for t in types.values()],
+                    default=0)
+  return (types, type_codes, max(int_width, 1), max(float_width, 1),
+          digit_width)
+
+
+def _arg_columns(problems, args):
+  '''
+  One list per argument, read off the attributes when
+  possible, digit row arguments as their uint8 rows
+  '''
+  first = problems[0]
+  digit_rows = type(first).digit_rows
+  attrs = [digit_rows.get(arg, arg) for arg in args]
+  if all(hasattr(first, attr) for attr in attrs):
+    return [list(map(operator.attrgetter(attr), problems)) for attr in attrs]
+  rows = [p.args() for p in problems]
+  return [list(map(operator.attrgetter(attr), problems)) if arg in digit_rows
+          else [row[arg] for row in rows] for arg, attr in zip(args, attrs)]
+
+
+def _put_rows(digits, index, rows, end):
+  '''Copy digit rows into digits[index], right aligned at column end'''
+  lengths = set(map(len, rows))
+  if len(lengths) == 1:
+    # usually every row of a type has as many digits
+    (width,) = lengths
+    digits[index, end - width:end] = np.stack(rows)
+    return
+  for k, row in zip(np.arange(len(digits))[index], rows):
+    digits[k, end - len(row):end] = row
+
+
+def save(quiz, path):
+  '''Write quiz, and its results when it has any, to path'''
+  problems = quiz.problems
+  n = len(problems)
+  types, type_codes, int_width, float_width, digit_width = _layout(problems)
+  names = list(types)
+  columns = {
+    'type': type_codes,
+    'pause': np.empty(n, dtype=np.float64),
+    'ints': np.zeros((n, int_width), dtype=np.int64),
+    'floats': np.zeros((n, float_width), dtype=np.float64),
+    'digits': np.zeros((n, digit_width), dtype=np.uint8),
+    'grades': np.full(n, -1, dtype=np.int8),
+    'times': np.full(n, np.nan, dtype=np.float64),
+    }
+  for code, name in enumerate(names):
+    if len(names) == 1:
+      index = slice(None)
+      group = problems
+    else:
+      index = np.flatnonzero(type_codes == code)
+      group = [problems[k] for k in index]
+    layout = types[name]
+    columns['pause'][index] = [p.pause for p in group]
+    i = f = d = 0
+    for values, kind in zip(_arg_columns(group, layout['args']),
+                            layout['kinds']):
+      if kind == 'f':
+        columns['floats'][index, f] = values
+        f += 1
+        continue
+      if kind == 'r':
+        offset, width = layout['digits'][d]
+        d += 1
+        _put_rows(columns['digits'], index, values, offset + width)
+        values = list(map(len, values))
+      elif kind == 'd':
+        values = [(v - EPOCH) // timedelta(seconds=1) for v in values]
+      elif kind == 's':
+        table = layout['strings']
+        lookup = {s: k for k, s in enumerate(table)}
+        for v in values:
+          if v not in lookup:
+            lookup[v] = len(table)
+            table.append(v)
+        values = [lookup[v] for v in values]
+      columns['ints'][index, i] = values
+      i += 1
+  graded = len(quiz.grades)
+  columns['grades'][:graded] = quiz.grades
+  columns['times'][:len(quiz.times)] = quiz.times
+
+  header = {'version': VERSION, 'count': n, 'types': names,
+            'layouts': [types[name] for name in names],
+            'learner': quiz.learner, 'log': quiz.log,
+            'finished': quiz.finished, 'columns': {}}
+  # offsets are relative to the end of the header
+  offset = 0
+  for name, column in columns.items():
+    header['columns'][name] = [column.dtype.str, offset, list(column.shape)]
+    offset += column.nbytes + _pad(column.nbytes)
+  data = json.dumps(header, separators=(',', ':')).encode()
+  data += b' ' * _pad(_PREFIX.size + len(data))
+  with open(path, 'wb') as f:
+    f.write(_PREFIX.pack(MAGIC, VERSION, 0, len(data)))
+    f.write(data)
+    for column in columns.values():
+      f.write(column.tobytes())
+      f.write(b'\0' * _pad(column.nbytes))
+
+
+class LazyProblems:
+  '''Sequence of problems built from the columns on access'''
+
+  def __init__(self, columns, types, layouts):
+    self.columns = columns
+    self.types = types
+    self.classes = [problem_types()[name] for name in types]
+    self.layouts = layouts
+    if 'digits' not in columns:
+      # version 1 files have no digit rows
+      columns['digits'] = np.zeros((len(self), 0), dtype=np.uint8)
+
+  def __len__(self):
+    return len(self.columns['type'])
+
+  def _make(self, code, ints, floats, digits, pause):
+    layout = self.layouts[code]
+    args = {}
+    i = f = d = 0
+    for arg, kind in zip(layout['args'], layout['kinds']):
+      if kind == 'f':
+        args[arg] = floats[f]
+        f += 1
+        continue
+      value = ints[i]
+      i += 1
+      if kind == 'd':
+        value = EPOCH + timedelta(seconds=value)
+      elif kind == 's':
+        value = layout['strings'][value]
+      elif kind == 'r':
+        offset, width = layout['digits'][d]
+        d += 1
+        value = digits[offset + width - value:offset + width]
+      args[arg] = value
+    return self.classes[code](pause=pause, **args)
+
+  def __getitem__(self, k):
+    if isinstance(k, slice):
+      return [self[i] for i in range(*k.indices(len(self)))]
+    c = self.columns
+    return self._make(int(c['type'][k]), c['ints'][k].tolist(),
+                      c['floats'][k].tolist(), np.array(c['digits'][k]),
+                      float(c['pause'][k]))
+
+  def __iter__(self, chunk=65536):
+    c = self.columns
+    for start in range(0, len(self), chunk):
+      end = start + chunk
+      # plain Python values a block at a time, not numpy scalars
+      for row in zip(c['type'][start:end].tolist(),
+                     c['ints'][start:end].tolist(),
+                     c['floats'][start:end].tolist(),
+                     np.array(c['digits'][start:end]),
+                     c['pause'][start:end].tolist()):
+        yield self._make(*row)
+
+  def columns_of(self, name):
+    '''
+    Constructor arguments and pause of the problems of
+    type name as arrays, without building the problems.
+    Datetimes are datetime64, strings unicode arrays and
+    digit rows a uint8 matrix, zero padded on the left.
+    '''
+    if name not in self.types:
+      raise ValueError(f'The quiz has no {name} problems')
+    code = self.types.index(name)
+    c = self.columns
+    if len(self.types) == 1:
+      # views of the mapped file
+      index = slice(None)
+    else:
+      index = np.flatnonzero(c['type'] == code)
+    layout = self.layouts[code]
+    columns = {'pause': c['pause'][index]}
+    i = f = d = 0
+    for arg, kind in zip(layout['args'], layout['kinds']):
+      if kind == 'f':
+        columns[arg] = c['floats'][index, f]
+        f += 1
+        continue
+      values = c['ints'][index, i]
+      i += 1
+      if kind == 'd':
+        values = np.datetime64(EPOCH, 's') + values.astype('timedelta64[s]')
+      elif kind == 's':
+        values = np.array(layout['strings'])[values]
+      elif kind == 'r':
+        offset, width = layout['digits'][d]
+        d += 1
+        values = c['digits'][index, offset:offset + width]
+      columns[arg] = values
+    return columns
+
+
+def load(path, mmap=True):
+  '''Read a quiz written by save(), columns are memory mapped'''
+  with open(path, 'rb') as f:
+    magic, version, _, size = _PREFIX.unpack(f.read(_PREFIX.size))
+    if magic != MAGIC:
+      raise ValueError(f'{path} is not a quiz file')
+    if version not in (1, VERSION):
+      raise ValueError(f'Unsupported quiz file version {version}')
+    header = json.loads(f.read(size))
+  start = _PREFIX.size + size
+  if mmap:
+    raw = np.memmap(path, dtype=np.uint8, mode='r')
+  else:
+    raw = np.fromfile(path, dtype=np.uint8)
+  columns = {}
+  for name, (dtype, offset, shape) in header['columns'].items():
+    dtype = np.dtype(dtype)
+    nbytes = dtype.itemsize * int(np.prod(shape))
+    begin = start + offset
+    columns[name] = raw[begin:begin + nbytes].view(dtype).reshape(shape)
+  problems = LazyProblems(columns, header['types'], header['layouts'])
+  quiz = Quiz(problems, log=header['log'], learner=header['learner'])
+  graded = columns['grades'] >= 0
+  quiz.grades = [bool(g) for g in columns['grades'][graded]]
+  quiz.times = columns['times'][graded].tolist()
+  if header['finished']:
+    quiz.types = [header['types'][c] for c in columns['type']]
+    quiz.finished = True
+  return quiz
@@ -0,0 +1,177 @@
+'''
+Per-learner record of recently seen facts
+
+Pass a SeenFacts as seen= to generate_quiz and facts
+the learner met in the last few days are skipped while
+there are unseen ones left:
+
+  seen = SeenFacts('ada_seen.npz', days=7)
+  quiz = Multiplication.generate_quiz(20, 2, 1, seen=seen)
+  seen.save()
+
+A fact is one point of a problem's operand space, e.g.
+(37, 6) for 2 digit by 1 digit multiplication. Small
+spaces are kept as a bitmap with one bit per fact and
+large ones as a Bloom filter, one set per day, and all
+lookups are vectorized over the candidate facts.
+'''
+import math
+import os
+from datetime import date, timedelta
+
+import numpy as np
+
+# spaces up to this many facts get an exact bitmap
+DENSE_LIMIT = 1 << 24
+# spaces up to this many facts are sampled from a full list of unseen ones
+ENUMERATE_LIMIT = 1 << 16
+# Bloom filter sizing for large spaces
+BLOOM_CAPACITY = 100000
+BLOOM_ERROR = 0.01
+
+_MASK64 = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+def _mix(x):
+  '''splitmix64 finalizer on uint64 arrays'''
+  with np.errstate(over='ignore'):
+    x = (x + np.uint64(0x9E3779B97F4A7C15)) & _MASK64
+    x = ((x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9))
+    x = ((x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB))
+    return x ^ (x >> np.uint64(31))
+
+
+class BitSet:
+  '''Exact set of ids in [0, size)'''
+
+  def __init__(self, size, bits=None):
+    self.size = size
+    if bits is None:
+      bits = np.zeros((size + 7) // 8, dtype=np.uint8)
+    self.bits = bits
+
+  def _set(self, positions):
+    np.bitwise_or.at(self.bits, positions >> 3,
+                     (1 << (positions & 7)).astype(np.uint8))
+
+  def _test(self, positions):
+    return ((self.bits[positions >> 3] >> (positions & 7)) & 1).astype(bool)
+
+  def add(self, ids):
+    self._set(np.asarray(ids, dtype=np.int64))
+
+  def contains(self, ids):
+    return self._test(np.asarray(ids, dtype=np.int64))
+
+
+class BloomSet(BitSet):
+  '''Approximate set, contains() may give false positives'''
+
+  def __init__(self, size, bits=None, capacity=BLOOM_CAPACITY,
+               error=BLOOM_ERROR):
+    m = int(-capacity * math.log(error) / math.log(2)**2)
+    self.hashes = max(1, round(m / capacity * math.log(2)))
+    # whole bytes so a loaded filter has the same m
+    self.m = 8 * ((m + 7) // 8)
+    super(BloomSet, self).__init__(self.m, bits)
+    self.size = size
+
+  def _positions(self, ids):
+    h = _mix(np.asarray(ids, dtype=np.uint64))
+    h1 = h & np.uint64(0xFFFFFFFF)
+    h2 = (h >> np.uint64(32)) | np.uint64(1)
+    k = np.arange(self.hashes, dtype=np.uint64)
+    with np.errstate(over='ignore'):
+      positions = (h1[:, None] + k * h2[:, None]) % np.uint64(self.m)
+    return positions.astype(np.int64)
+
+  def add(self, ids):
+    self._set(self._positions(ids).ravel())
+
+  def contains(self, ids):
+    return self._test(self._positions(ids)).all(axis=1)
+
+
+def _make_set(size, bits=None):
+  if size <= DENSE_LIMIT:
+    return BitSet(size, bits)
+  return BloomSet(size, bits)
+
+
+class SeenFacts:
+
+  def __init__(self, path=None, days=7, today=None):
+    '''
+    path: .npz file to load from and save to
+    days: how many days a fact counts as recently seen
+    '''
+    self.path = path
+    self.days = days
+    self.today = date.today() if today is None else today
+    # (day iso string, space) -> BitSet or BloomSet
+    self.sets = {}
+    if path is not None and os.path.exists(path):
+      self.load(path)
+
+  def _recent(self, space):
+    oldest = (self.today - timedelta(days=self.days - 1)).isoformat()
+    return [s for (day, name), s in self.sets.items()
+            if name == space and day >= oldest]
+
+  def contains(self, space, ids):
+    '''Vectorized check of fact ids in a space'''
+    ids = np.asarray(ids, dtype=np.int64)
+    seen = np.zeros(len(ids), dtype=bool)
+    for s in self._recent(space):
+      seen |= s.contains(ids)
+    return seen
+
+  def add(self, space, size, ids):
+    key = (self.today.isoformat(), space)
+    if key not in self.sets:
+      self.sets[key] = _make_set(size)
+    self.sets[key].add(ids)
+
+  def sample(self, space, ranges, num_problems):
+    '''
+    Draw num_problems operand tuples from the product of
+    ranges, unseen facts first, and mark them seen.
+    Returns one operand array per range.
+    '''
+    shape = tuple(len(r) for r in ranges)
+    size = int(np.prod(shape))
+    if size <= ENUMERATE_LIMIT:
+      # small spaces: pick among every unseen fact
+      unseen = np.flatnonzero(~self.contains(space, np.arange(size)))
+      candidates = np.random.permutation(unseen)
+    else:
+      candidates = np.random.randint(0, size, 4 * num_problems + 16,
+                                     dtype=np.int64)
+      candidates = candidates[~self.contains(space, candidates)]
+      _, first = np.unique(candidates, return_index=True)
+      candidates = candidates[np.sort(first)]
+    ids = candidates[:num_problems]
+    if len(ids) < num_problems:
+      # ran out of unseen facts, repeat seen ones
+      extra = np.random.randint(0, size, num_problems - len(ids),
+                                dtype=np.int64)
+      ids = np.concatenate([ids, extra])
+    self.add(space, size, ids)
+    index = np.unravel_index(ids, shape)
+    return tuple(r.start + i for r, i in zip(ranges, index))
+
+  def save(self, path=None):
+    path = self.path if path is None else path
+    oldest = (self.today - timedelta(days=self.days - 1)).isoformat()
+    arrays = {}
+    for (day, space), s in self.sets.items():
+      if day >= oldest:
+        arrays[f'{day}|{space}|{s.size}'] = s.bits
+    with open(path, 'wb') as f:
+      np.savez_compressed(f, **arrays)
+
+  def load(self, path):
+    with np.load(path) as data:
+      for name in data.files:
+        day, space, size = name.split('|')
+        self.sets[(day, space)] = _make_set(int(size), data[name])
@@ -0,0 +1,223 @@
+'''
+Local worksheet rendering service
+
+  python serve.py [--port 8000] [--cache-dir .worksheet_cache]
+
+  GET /questions?type=Multiplication&seed=3
+      &params={"num_problems":60,"digits_1":2,"digits_2":1}
+      &layout={"columns":6,"horizontal":true}
+  GET /answers?...same query...
+
+params and layout are JSON objects as in a build.py
+catalog. Seeded worksheets are rendered once and kept
+in a bounded in-memory LRU and a bounded directory of
+files, both keyed on build.spec_hash, and served with
+an ETag so a repeat download with If-None-Match gets
+an empty 304. Worksheets without a seed are random on
+every request and are never cached.
+
+  python serve.py --bench
+'''
+import argparse
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlsplit
+
+from build import render, spec_hash
+from mental_math_exercises import problem_types
+
+PARTS = {'/questions': 0, '/answers': 1}
+
+
+class WorksheetCache:
+  '''Rendered (questions, answers) by spec hash, in memory and on disk'''
+
+  def __init__(self, directory=None, max_entries=256, max_files=4096):
+    self.directory = directory
+    self.max_entries = max_entries
+    self.max_files = max_files
+    self.memory = OrderedDict()
+    self.lock = threading.Lock()
+    if directory is not None:
+      os.makedirs(directory, exist_ok=True)
+
+  def _path(self, key):
+    return os.path.join(self.directory, key + '.json')
+
+  def get(self, key):
+    with self.lock:
+      pages = self.memory.get(key)
+      if pages is not None:
+        self.memory.move_to_end(key)
+        return pages
+    if self.directory is None:
+      return None
+    try:
+      with open(self._path(key), 'rb') as f:
+        pages = tuple(page.encode() for page in json.load(f))
+    except (FileNotFoundError, ValueError):
+      return None
+    # the file's mtime orders evictions
+    os.utime(self._path(key))
+    self._remember(key, pages)
+    return pages
+
+  def put(self, key, pages):
+    '''pages: (questions, answers) as bytes'''
+    self._remember(key, pages)
+    if self.directory is None:
+      return
+    path = self._path(key)
+    tmp = f'{path}.{threading.get_ident()}.tmp'
+    with open(tmp, 'w') as f:
+      json.dump([page.decode() for page in pages], f)
+    os.replace(tmp, path)
+    self._trim_files()
+
+  def _remember(self, key, pages):
+    with self.lock:
+      self.memory[key] = pages
+      self.memory.move_to_end(key)
+      while len(self.memory) > self.max_entries:
+        self.memory.popitem(last=False)
+
+  def _trim_files(self):
+    files = [e for e in os.scandir(self.directory)
+             if e.name.endswith('.json')]
+    if len(files) <= self.max_files:
+      return
+    files.sort(key=lambda e: e.stat().st_mtime)
+    for entry in files[:len(files) - self.max_files]:
+      try:
+        os.remove(entry.path)
+      except FileNotFoundError:
+        pass
+
+
+def parse_spec(query):
+  '''build.py style spec from a parsed query string'''
+  spec = {}
+  kind = query.get('type', [None])[0]
+  if kind not in problem_types():
+    raise ValueError(f'Unknown problem type {kind!r}')
+  spec['type'] = kind
+  for name in ('params', 'layout'):
+    if name in query:
+      value = json.loads(query[name][0])
+      if not isinstance(value, dict):
+        raise ValueError(f'{name} must be a JSON object')
+      spec[name] = value
+  if 'seed' in query:
+    spec['seed'] = int(query['seed'][0])
+  return spec
+
+
+class WorksheetHandler(BaseHTTPRequestHandler):
+  # set on the server class by make_server
+  cache = None
+
+  def do_GET(self):
+    url = urlsplit(self.path)
+    part = PARTS.get(url.path)
+    if part is None:
+      self.send_error(404)
+      return
+    try:
+      spec = parse_spec(parse_qs(url.query))
+    except ValueError as e:
+      self.send_error(400, str(e))
+      return
+    seeded = 'seed' in spec
+    key = spec_hash(spec)
+    etag = f'"{key}"'
+    if seeded and etag in self.headers.get('If-None-Match', ''):
+      self.send_response(304)
+      self.send_header('ETag', etag)
+      self.end_headers()
+      return
+    pages = self.cache.get(key) if seeded else None
+    if pages is None:
+      try:
+        pages = tuple(page.encode() for page in render(spec))
+      except (TypeError, ValueError) as e:
+        self.send_error(400, str(e))
+        return
+      if seeded:
+        self.cache.put(key, pages)
+    body = pages[part]
+    self.send_response(200)
+    self.send_header('Content-Type', 'text/html; charset=utf-8')
+    self.send_header('Content-Length', str(len(body)))
+    if seeded:
+      self.send_header('ETag', etag)
+    else:
+      self.send_header('Cache-Control', 'no-store')
+    self.end_headers()
+    self.wfile.write(body)
+
+  def log_message(self, format, *args):
+    if not self.server.quiet:
+      super(WorksheetHandler, self).log_message(format, *args)
+
+
+def make_server(host='127.0.0.1', port=8000, cache=None, quiet=False):
+  handler = type('Handler', (WorksheetHandler,),
+                 {'cache': WorksheetCache() if cache is None else cache})
+  server = ThreadingHTTPServer((host, port), handler)
+  server.quiet = quiet
+  return server
+
+
+def bench(requests=500, cache_dir=None):
+  '''Cold renders, warm cache hits and 304s against a local server'''
+  import http.client
+  server = make_server(port=0, cache=WorksheetCache(cache_dir), quiet=True)
+  threading.Thread(target=server.serve_forever, daemon=True).start()
+  conn = http.client.HTTPConnection('127.0.0.1', server.server_address[1])
+  params = quote('{"num_problems":60,"digits_1":2,"digits_2":1}')
+
+  def fetch(seed, etag=None):
+    headers = {} if etag is None else {'If-None-Match': etag}
+    conn.request('GET', f'/questions?type=Multiplication&seed={seed}'
+                        f'&params={params}', headers=headers)
+    response = conn.getresponse()
+    response.read()
+    return response.getheader('ETag')
+
+  cold = max(1, requests // 10)
+  t1 = time.perf_counter()
+  etags = [fetch(seed) for seed in range(cold)]
+  t2 = time.perf_counter()
+  for k in range(requests):
+    fetch(k % cold)
+  t3 = time.perf_counter()
+  for k in range(requests):
+    fetch(k % cold, etags[k % cold])
+  t4 = time.perf_counter()
+  server.shutdown()
+  print(f'serve: cold {cold / (t2 - t1):.0f} req/s, '
+        f'cached {requests / (t3 - t2):.0f} req/s, '
+        f'304 {requests / (t4 - t3):.0f} req/s')
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+  parser.add_argument('--host', default='127.0.0.1')
+  parser.add_argument('--port', type=int, default=8000)
+  parser.add_argument('--cache-dir', default='.worksheet_cache')
+  parser.add_argument('--max-entries', type=int, default=256)
+  parser.add_argument('--max-files', type=int, default=4096)
+  parser.add_argument('--bench', action='store_true',
+                      help='time a local server instead of serving')
+  args = parser.parse_args()
+  if args.bench:
+    bench()
+  else:
+    cache = WorksheetCache(args.cache_dir, args.max_entries, args.max_files)
+    server = make_server(args.host, args.port, cache)
+    print(f'Serving worksheets on http://{args.host}:{args.port}/')
+    server.serve_forever()
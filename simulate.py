@@ -0,0 +1,135 @@
+'''
+Simulated learners running on a virtual clock
+
+Drives the real Quiz.worksheet grading code, and the
+legacy mental_math.py drills, without sleeping or
+waiting on input() so thousands of sessions can be
+benchmarked in seconds.
+
+  clock = VirtualClock()
+  learner = SimulatedLearner(clock, seed=0)
+  summaries = run_sessions(
+    lambda: Multiplication.generate_quiz(20, 2, 1), learner, 1000)
+'''
+import contextlib
+import io
+import json
+
+import numpy as np
+
+
+class VirtualClock:
+  '''Stands in for the time module, sleep() only advances now'''
+
+  def __init__(self, start=0.0):
+    self.now = float(start)
+
+  def time(self):
+    return self.now
+
+  monotonic = time
+  perf_counter = time
+
+  def sleep(self, seconds):
+    self.now += seconds
+
+  def advance(self, seconds):
+    self.now += seconds
+
+
+class LearnerProfile:
+  '''
+  accuracy: chance of a correct answer
+  latency: median answer time in seconds
+  spread: sigma of the log-normal answer time
+  '''
+
+  def __init__(self, accuracy=0.9, latency=4.0, spread=0.5):
+    self.accuracy = accuracy
+    self.latency = latency
+    self.spread = spread
+
+
+def wrong_answer(problem):
+  '''An answer match_answer rejects'''
+  expected = problem.expected_answer()
+  if type(problem).__name__ == 'DayOfTheWeek':
+    return (expected + 1) % 7
+  return expected + 1 + 2 * getattr(problem, 'abs_tol', 0)
+
+
+class SimulatedLearner:
+  '''
+  Quiz hook and input() replacement, answers the
+  current question after a sampled delay
+  profiles: problem type name -> LearnerProfile
+  '''
+
+  def __init__(self, clock, profiles=None, default=None, seed=None):
+    self.clock = clock
+    self.profiles = {} if profiles is None else profiles
+    self.default = LearnerProfile() if default is None else default
+    self.rng = np.random.default_rng(seed)
+    self.problem = None
+
+  def on_question(self, quiz, index, problem):
+    self.problem = problem
+
+  def read(self):
+    problem = self.problem
+    profile = self.profiles.get(type(problem).__name__, self.default)
+    self.clock.advance(
+      self.rng.lognormal(np.log(profile.latency), profile.spread))
+    if self.rng.random() < profile.accuracy:
+      return str(problem.expected_answer())
+    return str(wrong_answer(problem))
+
+
+def run_session(quiz, learner, grade=True):
+  '''Run one quiz through worksheet() with the learner answering'''
+  quiz.add_hook(learner)
+  with contextlib.redirect_stdout(io.StringIO()):
+    quiz.worksheet(speak=False, grade=grade, write=False,
+                   clock=learner.clock, read=learner.read)
+  quiz.hooks.remove(learner)
+  return quiz
+
+
+def run_sessions(make_quiz, learner, num_sessions, grade=True):
+  '''
+  Run num_sessions quizzes from make_quiz(), returns
+  their summaries as dicts
+  '''
+  summaries = []
+  for k in range(num_sessions):
+    quiz = run_session(make_quiz(), learner, grade)
+    summaries.append(json.loads(quiz.get_summary()))
+  return summaries
+
+
+@contextlib.contextmanager
+def patched(module, **attrs):
+  '''Temporarily replace module level names'''
+  saved = {name: getattr(module, name) for name in attrs}
+  for name, value in attrs.items():
+    setattr(module, name, value)
+  try:
+    yield module
+  finally:
+    for name, value in saved.items():
+      setattr(module, name, value)
+
+
+def run_legacy(drill, clock=None, **kwargs):
+  '''
+  Run a mental_math.py drill such as mental_math.addition
+  on a virtual clock, returns [(time, spoken text)]
+  '''
+  import mental_math
+  clock = VirtualClock() if clock is None else clock
+  transcript = []
+  def say(text):
+    transcript.append((clock.time(), text))
+  with patched(mental_math, time=clock, say=say):
+    drill(**kwargs)
+  return transcript
@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from checkpoint import Journal, load, resume_worksheet
+from mental_math_exercises import Multiplication
+from simulate import SimulatedLearner, VirtualClock
+
+
+def _run(quiz, path, stop_after=None):
+  clock = VirtualClock()
+  learner = SimulatedLearner(clock, seed=0)
+  answers = iter(range(stop_after)) if stop_after is not None else None
+
+  def read():
+    if answers is not None and next(answers, None) is None:
+      raise KeyboardInterrupt
+    return learner.read()
+  quiz.add_hook(learner).add_hook(Journal(path, sync_every=1))
+  quiz.worksheet(speak=False, write=False, clock=clock, read=read)
+
+
+def test_reused_path_starts_a_new_journal(tmp_path):
+  path = str(tmp_path / 'today.journal')
+  _run(Multiplication.generate_quiz(3, 2, 1), path)
+  second = Multiplication.generate_quiz(4, 2, 1)
+  with pytest.raises(KeyboardInterrupt):
+    _run(second, path, stop_after=2)
+  quiz, start, finished = load(path)
+  assert not finished
+  assert start == 2
+  assert len(quiz.problems) == 4
+
+
+def test_unfinished_journal_is_not_overwritten(tmp_path):
+  path = str(tmp_path / 'today.journal')
+  with pytest.raises(KeyboardInterrupt):
+    _run(Multiplication.generate_quiz(4, 2, 1), path, stop_after=1)
+  with pytest.raises(FileExistsError):
+    _run(Multiplication.generate_quiz(4, 2, 1), path)
+
+
+def test_resume_checks_the_quiz(tmp_path):
+  path = str(tmp_path / 'today.journal')
+  with pytest.raises(KeyboardInterrupt):
+    _run(Multiplication.generate_quiz(4, 2, 1), path, stop_after=1)
+  other = Multiplication.generate_quiz(4, 2, 1)
+  hook = Journal(path, resume=True)
+  with pytest.raises(ValueError, match='different quiz'):
+    hook.on_question(other, 0, other.problems[0])
+  clock = VirtualClock()
+  learner = SimulatedLearner(clock, seed=1)
+  quiz = resume_worksheet(path, hooks=[learner], speak=False, write=False,
+                          clock=clock, read=learner.read)
+  assert quiz.finished
+  assert len(quiz.grades) == 4
+  assert load(path)[2]
+
+
+class _StopAt:
+  '''Hook interrupting a worksheet when problem index is asked'''
+
+  def __init__(self, index):
+    self.index = index
+
+  def on_question(self, quiz, index, problem):
+    if index == self.index:
+      raise KeyboardInterrupt
+
+
+def test_resume_rejects_a_different_grade_setting(tmp_path):
+  path = str(tmp_path / 'today.journal')
+  with pytest.raises(KeyboardInterrupt):
+    _run(Multiplication.generate_quiz(4, 2, 1), path, stop_after=2)
+  with pytest.raises(ValueError, match='grade=True'):
+    resume_worksheet(path, speak=False, write=False, clock=VirtualClock(),
+                     grade=False)
+  assert not load(path)[2]
+
+
+def test_listen_mode_journal_resumes_without_grading(tmp_path):
+  path = str(tmp_path / 'today.journal')
+  quiz = Multiplication.generate_quiz(4, 2, 1)
+  # the Journal opens on the first question, so it goes ahead of the stop
+  quiz.add_hook(Journal(path, sync_every=1)).add_hook(_StopAt(2))
+  with pytest.raises(KeyboardInterrupt):
+    quiz.worksheet(speak=False, write=False, grade=False, clock=VirtualClock())
+  log = str(tmp_path / 'log.jsonl')
+  quiz = resume_worksheet(path, speak=False, write=False, clock=VirtualClock(),
+                          log=log)
+  assert quiz.finished and quiz.grades == []
+  with open(log) as f:
+    assert json.loads(f.read())['graded'] is False
@@ -0,0 +1,34 @@
+import pytest
+
+from drills import drill
+
+
+def test_answers_that_overflow_int64_are_exact():
+  Seventh = drill('a**7 where a in 3digit', 'Seventh')
+  for problem in Seventh.generate_quiz(50).problems:
+    (a,) = problem.operands
+    assert problem.answer == a**7
+    assert problem.match_answer(str(a**7))
+
+
+def test_small_answers_stay_int64():
+  assert drill('a*b where a in 9digit, b in 9digit', 'Small').dtype is not object
+
+
+@pytest.mark.parametrize('spec', [
+  'a//b where a in 2digit, b in 0..2',
+  'a%b where a in 2digit, b in -3..3',
+  'a//(b-5) where a in 1digit, b in 1..9',
+  ])
+def test_zero_divisor_is_rejected(spec):
+  with pytest.raises(ValueError, match='can be zero'):
+    drill(spec, 'Divide')
+
+
+@pytest.mark.parametrize('spec', [
+  'a**-1 where a in 2digit',
+  'a**b where a in 2digit, b in -1..3',
+  ])
+def test_negative_exponent_is_rejected(spec):
+  with pytest.raises(ValueError, match='can be negative'):
+    drill(spec, 'Power')
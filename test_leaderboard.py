@@ -0,0 +1,18 @@
+from leaderboard import Leaderboard
+
+
+def _summary(learner, correct, mean_time, count=10):
+  return {'learner': learner, 'graded': True, 'by_type': {
+    'Multiplication': {'problem_count': count, 'correct_count': correct,
+                       'mean_time': mean_time}}}
+
+
+def test_fast_wrong_answers_do_not_win_the_speed_board():
+  board = Leaderboard()
+  board.update(_summary('guesser', 0, 0.5))
+  board.update(_summary('ada', 9, 3.0))
+  board.update(_summary('bo', 8, 2.0))
+  assert [e['learner'] for e in board.top('Multiplication', 'speed')] == \
+    ['bo', 'ada']
+  assert board.rank('guesser', 'Multiplication', 'speed') is None
+  assert board.rank('guesser', 'Multiplication', 'accuracy') == 3
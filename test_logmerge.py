@@ -0,0 +1,41 @@
+import json
+
+from logmerge import merge, merge_logs
+
+
+def _write(path, dates, tail=''):
+  with open(path, 'w') as f:
+    for date in dates:
+      f.write(json.dumps({'quiz_date': date, 'learner': 'ada'}) + '\n')
+    f.write(tail)
+
+
+def _dates(lines):
+  return [json.loads(line)['quiz_date'] for line in lines]
+
+
+def test_fall_back_lines_are_merged_into_place(tmp_path):
+  phone = str(tmp_path / 'phone.log')
+  tablet = str(tmp_path / 'tablet.log')
+  # clocks went back an hour after the 01:50 session
+  _write(phone, ['2026-11-01T01:10:00', '2026-11-01T01:50:00',
+                 '2026-11-01T01:20:00', '2026-11-01T02:30:00'])
+  _write(tablet, ['2026-11-01T01:15:00', '2026-11-01T01:50:00'],
+         tail='{"quiz_da')
+  reports = []
+  lines = list(merge([phone, tablet], report=reports.append))
+  assert _dates(lines) == ['2026-11-01T01:10:00', '2026-11-01T01:15:00',
+                           '2026-11-01T01:20:00', '2026-11-01T01:50:00',
+                           '2026-11-01T02:30:00']
+  assert len(reports) == 1 and 'phone.log:3' in reports[0]
+
+
+def test_merging_into_an_input_is_repeatable(tmp_path):
+  store = str(tmp_path / 'all.log')
+  phone = str(tmp_path / 'phone.log')
+  _write(store, [])
+  _write(phone, ['2026-10-02T10:00:00', '2026-10-01T10:00:00'])
+  assert merge_logs(store, [store, phone]) == 2
+  assert merge_logs(store, [store, phone]) == 2
+  with open(store) as f:
+    assert _dates(f) == ['2026-10-01T10:00:00', '2026-10-02T10:00:00']
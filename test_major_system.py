@@ -0,0 +1,19 @@
+import major_system
+
+
+def test_loaded_words_replace_built_in_pegs(tmp_path):
+  path = tmp_path / 'words.txt'
+  path.write_text('rhino 42\nrune 42\nmeadow\n')
+  trie = major_system.load_words(str(path))
+  assert major_system.peg('42', trie) == 'rhino'
+  assert trie.words('42') == ['rhino', 'rune', 'rain']
+  assert major_system.peg('31', trie) == 'meadow'
+  # the built in pegs still cover everything else
+  assert major_system.peg('99', trie) == 'baby'
+  assert major_system.peg('42') == 'rain'
+
+
+def test_encode_uses_the_fewest_words():
+  pegs = major_system.encode('31415926')
+  assert ''.join(digits for digits, _ in pegs) == '31415926'
+  assert len(pegs) == 3
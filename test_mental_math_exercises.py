@@ -0,0 +1,126 @@
+import json
+
+import numpy as np
+import pytest
+
+from mental_math_exercises import (Addition, LongModulo, Multiplication,
+                                   ProblemView, Quiz)
+from simulate import LearnerProfile, SimulatedLearner, VirtualClock
+
+
+def _sprint(source, seconds=60):
+  clock = VirtualClock()
+  learner = SimulatedLearner(clock, default=LearnerProfile(latency=2), seed=0)
+  return Quiz.sprint(source, seconds=seconds, write=False, hooks=[learner],
+                     clock=clock, read=learner.read)
+
+
+def _worksheet(quiz):
+  clock = VirtualClock()
+  learner = SimulatedLearner(clock, seed=0)
+  quiz.add_hook(learner)
+  quiz.worksheet(speak=False, write=False, clock=clock, read=learner.read)
+  return quiz
+
+
+def test_sprint_stops_at_the_deadline():
+  quiz = _sprint(lambda: Multiplication.generate_quiz(20, 2, 1))
+  assert quiz.finished
+  assert len(quiz.grades) == len(quiz.problems) > 0
+  assert quiz.sprint_stats['seconds'] >= 60
+
+
+def test_sprint_reraises_source_errors():
+  def source():
+    raise KeyError('broken source')
+  with pytest.raises(KeyError, match='broken source'):
+    _sprint(source)
+
+
+def test_sprint_rejects_an_empty_source():
+  with pytest.raises(ValueError, match='empty quiz'):
+    _sprint(lambda: Quiz([]))
+
+
+@pytest.mark.parametrize('modulo', [9, 11, 97, 10**17 + 3, 10**18 + 9])
+def test_long_modulo_residues_are_exact(modulo):
+  quiz = LongModulo.generate_quiz(50, digits=100, modulo=modulo)
+  for problem in quiz.problems:
+    assert problem.answer == int(problem.value) % modulo
+
+
+def test_long_modulo_rejects_overflowing_moduli():
+  with pytest.raises(ValueError):
+    LongModulo.generate_quiz(1, digits=10, modulo=2**62)
+
+
+@pytest.mark.parametrize('value', ['-12', '1.5', '', '12a', -3])
+def test_long_modulo_rejects_non_digit_values(value):
+  with pytest.raises(ValueError):
+    LongModulo(value, 9)
+
+
+def test_summary_of_a_partially_graded_quiz():
+  quiz = Multiplication.generate_quiz(3, 2, 1)
+  quiz.finish([True], [1.5], ['Multiplication'] * 3)
+  summary = json.loads(quiz.get_summary())
+  assert summary['correct_count'] == 1
+  assert summary['by_type'] == {}
+
+
+def _args(quiz):
+  return [p.args() for p in quiz.problems]
+
+
+def test_views_of_views_index_the_same_problems():
+  quiz = Multiplication.generate_quiz(10, 2, 1)
+  view = quiz[2:8][::2][[2, 0]]
+  assert isinstance(view.problems, ProblemView)
+  assert view.problems.base is quiz.problems
+  assert view.problems.index.tolist() == [6, 2]
+  assert view.problems[0] is quiz.problems[6]
+  assert list(view.problems) == [quiz.problems[6], quiz.problems[2]]
+  assert quiz[3] is quiz.problems[3]
+
+
+def test_boolean_masks_select_problems():
+  quiz = Multiplication.generate_quiz(6, 2, 1)
+  mask = np.array([True, False, True, False, False, True])
+  assert quiz[mask].problems.index.tolist() == [0, 2, 5]
+  nested = quiz.view(mask)[np.array([False, True, True])]
+  assert nested.problems.index.tolist() == [2, 5]
+
+
+def test_permutations_are_reproducible():
+  quiz = Multiplication.generate_quiz(20, 2, 1)
+  a, b = quiz.permute(seed=4), quiz.permute(seed=4)
+  assert a.problems.index.tolist() == b.problems.index.tolist()
+  assert sorted(a.problems.index.tolist()) == list(range(20))
+  variants = quiz.variants(3, seed=4)
+  orders = [v.problems.index.tolist() for v in variants]
+  assert len({tuple(o) for o in orders}) == 3
+  assert orders == [v.problems.index.tolist()
+                    for v in quiz.variants(3, seed=4)]
+
+
+def test_of_type_and_concat():
+  mixed = Quiz.concat(Multiplication.generate_quiz(3, 2, 1),
+                      Addition.generate_quiz(2, 2, 2))
+  # different problem lists are gathered into a new list
+  assert isinstance(mixed.problems, list) and len(mixed) == 5
+  sums = mixed.of_type('Addition')
+  assert _args(sums) == _args(mixed)[3:]
+  assert len(mixed.of_type('Addition', 'Multiplication')) == 5
+  # views of one list stay a single index over it
+  joined = Quiz.concat(mixed[3:], mixed[:1], mixed.of_type('Addition'))
+  assert joined.problems.base is mixed.problems
+  assert joined.problems.index.tolist() == [3, 4, 0, 3, 4]
+
+
+def test_each_view_has_its_own_grading_state():
+  quiz = Multiplication.generate_quiz(6, 2, 1)
+  first = _worksheet(quiz[:3])
+  second = quiz[3:]
+  assert len(first.grades) == 3 and first.finished
+  assert quiz.grades == [] and not quiz.finished
+  assert second.grades == [] and not second.finished
@@ -0,0 +1,39 @@
+import pytest
+
+from plan import PlanError, compile_plan
+
+
+def _compile(params, kind='Multiplication'):
+  return compile_plan({'routines': {'r': [{'type': kind, 'params': params}]},
+                       'schedule': {'daily': ['r']}})
+
+
+@pytest.mark.parametrize('params, path', [
+  ({'num_problems': 2, 'digits_1': '2'}, 'params.digits_1'),
+  ({'num_problems': 2, 'digits_1': 2.5}, 'params.digits_1'),
+  ({'num_problems': 2, 'pause': 'slow'}, 'params.pause'),
+  ({'num_problems': 2, 'seen': 'ada.npz'}, 'params.seen'),
+  ])
+def test_bad_params_fail_at_compile_time(params, path):
+  with pytest.raises(PlanError, match=f'routines.r\\[0\\].{path}'):
+    _compile(params)
+
+
+def test_params_are_converted_for_generation():
+  plan = _compile({'num_problems': 2, 'pause': 1.5, 'start': '1900-01-01',
+                   'end': '1901-01-01'}, 'DayOfTheWeek')
+  (name, quiz), = plan.day().quizzes
+  assert [p.date_time.year for p in quiz.problems] == [1900, 1900]
+  assert quiz.problems[0].pause == 1.5
+
+
+def test_unseeded_blocks_after_a_seeded_one_stay_random():
+  plan = compile_plan({'routines': {'r': [
+    {'type': 'Multiplication', 'params': {'num_problems': 3}, 'seed': 7},
+    {'type': 'Addition', 'params': {'num_problems': 20}}]},
+    'schedule': {'daily': ['r']}})
+  days = [plan.day().quizzes[0][1].problems for _ in range(2)]
+  seeded = [[p.args() for p in problems[:3]] for problems in days]
+  unseeded = [[p.args() for p in problems[3:]] for problems in days]
+  assert seeded[0] == seeded[1]
+  assert unseeded[0] != unseeded[1]
@@ -0,0 +1,88 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+import quizfile
+from checkpoint import Journal
+from drills import NearHundred, TimesEleven
+from mental_math_exercises import DayOfTheWeek, LongModulo, Multiplication, Quiz
+from simulate import SimulatedLearner, VirtualClock, run_session
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _fresh_process(code):
+  '''Output of code run by a new interpreter that never imports drills'''
+  result = subprocess.run([sys.executable, '-c', code], cwd=HERE,
+                          capture_output=True, text=True, check=True)
+  return result.stdout.split('\n')
+
+
+def test_drill_quiz_round_trips_in_a_new_process(tmp_path):
+  quiz = Quiz(TimesEleven.generate_quiz(3).problems +
+              NearHundred.generate_quiz(3).problems)
+  path = str(tmp_path / 'drills.mmq')
+  quizfile.save(quiz, path)
+  out = _fresh_process(
+    'import quizfile\n'
+    f'for p in quizfile.load({path!r}).problems: print(p.human_readable())')
+  assert out[:-1] == [str(p.human_readable()) for p in quiz.problems]
+
+
+def test_drill_journal_loads_in_a_new_process(tmp_path):
+  quiz = TimesEleven.generate_quiz(3)
+  path = str(tmp_path / 'drills.journal')
+  quiz.add_hook(Journal(path))
+  run_session(quiz, SimulatedLearner(VirtualClock(), seed=0))
+  out = _fresh_process(
+    'import checkpoint\n'
+    f'quiz, _, finished = checkpoint.load({path!r})\n'
+    'print(finished, [p.args() for p in quiz.problems])')
+  assert out[0] == f'True {[p.args() for p in quiz.problems]}'
+
+
+def _header_size(path):
+  with open(path, 'rb') as f:
+    return quizfile._PREFIX.unpack(f.read(quizfile._PREFIX.size))[3]
+
+
+def test_long_modulo_round_trips(tmp_path):
+  problems = [LongModulo('0071', 9), LongModulo('123456789', 11),
+              Multiplication(12, 3)] + LongModulo.generate_quiz(5).problems
+  path = str(tmp_path / 'long.mmq')
+  quizfile.save(Quiz(problems), path)
+  loaded = quizfile.load(path).problems
+  assert [p.args() for p in loaded] == [p.args() for p in problems]
+  assert [p.answer for p in loaded] == [p.answer for p in problems]
+
+
+def test_digit_rows_stay_out_of_the_header(tmp_path):
+  sizes = []
+  for n in (10, 5000):
+    path = str(tmp_path / f'{n}.mmq')
+    quizfile.save(LongModulo.generate_quiz(n, digits=40), path)
+    sizes.append(_header_size(path))
+  # only the counts and offsets written in it grow
+  assert sizes[1] - sizes[0] <= quizfile.ALIGN
+
+
+def test_columns_of_reads_arguments_as_arrays(tmp_path):
+  longs = [LongModulo('0071', 7), LongModulo('123', 7)]
+  dates = DayOfTheWeek.generate_quiz(3).problems
+  path = str(tmp_path / 'mixed.mmq')
+  quizfile.save(Quiz([longs[0]] + dates + [longs[1]]), path)
+  problems = quizfile.load(path).problems
+  columns = problems.columns_of('LongModulo')
+  assert columns['value'].tolist() == [[0, 0, 7, 1], [0, 1, 2, 3]]
+  assert columns['modulo'].tolist() == [7, 7]
+  assert columns['pause'].tolist() == [30, 30]
+  assert np.array_equal(LongModulo.residues(columns['value'], 7),
+                        [p.answer for p in longs])
+  dates_column = problems.columns_of('DayOfTheWeek')['date_time']
+  assert dates_column.tolist() == [p.date_time.replace(microsecond=0)
+                                   for p in dates]
+  with pytest.raises(ValueError):
+    problems.columns_of('Addition')
@@ -0,0 +1,68 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+from seen import DENSE_LIMIT, BitSet, BloomSet, SeenFacts
+
+DAY = date(2026, 10, 19)
+
+
+def _ids(operands, ranges):
+  shape = tuple(len(r) for r in ranges)
+  index = tuple(o - r.start for o, r in zip(operands, ranges))
+  return np.ravel_multi_index(index, shape)
+
+
+def test_no_repeats_until_a_small_space_is_exhausted():
+  np.random.seed(0)
+  seen = SeenFacts(today=DAY)
+  ranges = (range(10, 20), range(1, 6))
+  drawn = [_ids(seen.sample('mult', ranges, 15), ranges) for _ in range(3)]
+  drawn = np.concatenate(drawn)
+  assert len(np.unique(drawn)) == 45
+  last = _ids(seen.sample('mult', ranges, 10), ranges)
+  # the 5 unseen facts come first, then seen ones repeat
+  assert set(last[:5].tolist()) == set(range(50)) - set(drawn.tolist())
+  assert seen.contains('mult', np.arange(50)).all()
+
+
+def test_save_drops_days_outside_the_window(tmp_path):
+  path = str(tmp_path / 'ada_seen.npz')
+  old = SeenFacts(path, days=3, today=DAY)
+  old.add('mult', 100, [1, 2])
+  old.save()
+  kept = SeenFacts(path, days=3, today=DAY + timedelta(days=2))
+  assert kept.contains('mult', [1, 2, 3]).tolist() == [True, True, False]
+  later = SeenFacts(path, days=3, today=DAY + timedelta(days=3))
+  assert not later.contains('mult', [1, 2]).any()
+  later.add('mult', 100, [3])
+  later.save()
+  with np.load(path) as data:
+    assert data.files == [f'{later.today.isoformat()}|mult|100']
+  reloaded = SeenFacts(path, days=3, today=later.today)
+  assert reloaded.contains('mult', [1, 2, 3]).tolist() == [False, False, True]
+
+
+def test_large_spaces_use_a_bloom_filter(tmp_path):
+  np.random.seed(1)
+  path = str(tmp_path / 'ada_seen.npz')
+  seen = SeenFacts(path, today=DAY)
+  ranges = (range(10000), range(10000))
+  assert len(ranges[0]) * len(ranges[1]) > DENSE_LIMIT
+  ids = _ids(seen.sample('big', ranges, 1000), ranges)
+  assert len(np.unique(ids)) == 1000
+  (facts,) = seen.sets.values()
+  assert isinstance(facts, BloomSet)
+  seen.save()
+  reloaded = SeenFacts(path, today=DAY)
+  (loaded,) = reloaded.sets.values()
+  assert isinstance(loaded, BloomSet) and loaded.m == facts.m
+  assert reloaded.contains('big', ids).all()
+  others = np.setdiff1d(np.random.randint(0, 10**8, 20000), ids)
+  assert reloaded.contains('big', others).mean() < 0.01
+
+
+def test_bitset_is_exact():
+  bits = BitSet(20)
+  bits.add([0, 7, 8, 19])
+  assert np.flatnonzero(bits.contains(np.arange(20))).tolist() == [0, 7, 8, 19]
@@ -0,0 +1,48 @@
+import http.client
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+from build import generate, render
+from serve import WorksheetCache, make_server
+
+
+def test_concurrent_seeded_requests_match_serial_renders():
+  server = make_server(port=0, cache=WorksheetCache(), quiet=True)
+  threading.Thread(target=server.serve_forever, daemon=True).start()
+  port = server.server_address[1]
+  # a Python loop of draws, so threads switch in the middle
+  params = {'num_problems': 3000}
+
+  def fetch(seed):
+    conn = http.client.HTTPConnection('127.0.0.1', port)
+    query = f'type=DayOfTheWeek&params={quote(json.dumps(params))}'
+    if seed is not None:
+      query += f'&seed={seed}'
+    conn.request('GET', f'/questions?{query}')
+    body = conn.getresponse().read().decode()
+    conn.close()
+    return seed, body
+
+  # unseeded requests draw from the same generators in between
+  seeds = [k % 8 for k in range(64)] + [None] * 32
+  try:
+    with ThreadPoolExecutor(16) as pool:
+      results = list(pool.map(fetch, seeds))
+  finally:
+    server.shutdown()
+  for seed, body in results:
+    if seed is not None:
+      expected = render({'type': 'DayOfTheWeek', 'params': params,
+                         'seed': seed})[0]
+      assert body == expected
+
+
+def test_unseeded_specs_after_a_seeded_one_stay_random():
+  spec = {'type': 'Multiplication', 'params': {'num_problems': 20}}
+  draws = []
+  for _ in range(2):
+    generate({**spec, 'seed': 3})
+    draws.append([p.args() for p in generate(spec).problems])
+  assert draws[0] != draws[1]